@@ -0,0 +1,256 @@
+"""
+Corpus-level AMSTAR assessment of short items in batched multi-article calls.
+
+Some AMSTAR 2 items can be decided from a few passages: Item 16 (conflicts of
+interest), Item 10 (funding of included studies) and Item 1 (PICO). For these,
+the relevant snippets are pulled from each article locally and many articles
+are packed into one request per item, so the criteria are applied the same way
+across the corpus and the per-article prompt only covers the remaining items.
+Answers are keyed by Item_N, exactly as calculate_amstar_overall_rating reads
+them; articles whose snippets are missing or inconclusive are left to the
+per-article assessment.
+
+    python amstar_batch.py "/path/to/articles/*.txt" --qc DataExtract_QC.csv --results results.db
+    python amstar_batch.py "/path/to/articles/*.txt" --results results.db --update-existing
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from article_store import read_article
+from model_routing import validate_amstar
+
+# Question wording as in DualExtractionAPI.build_amstar_prompt; patterns are tried in priority order
+BATCH_ITEMS = {
+    'Item_16': {
+        'question': "Did the authors report potential sources of conflict of interest? The authors reported no "
+                    "competing interests OR The authors described their funding sources and how they managed "
+                    "potential conflicts of interest",
+        'lead_chars': 0,
+        'patterns': [
+            r'conflicts? of interest|competing interests?|declarations? of (?:competing )?interests?|disclosures?',
+            r'funding|funded by|grants?\b|financial support',
+        ],
+    },
+    'Item_10': {
+        'question': "Did the authors report on sources of funding for included studies? Must have reported on the "
+                    "sources of funding for individual studies included in the review.",
+        'lead_chars': 0,
+        'patterns': [
+            r'sources? of funding|funding sources?|(?:industry|pharmaceutical|commercial)[- ](?:funded|sponsored|funding)'
+            r'|sponsorship|study funding',
+            r'funded by|funding|sponsors?\b',
+        ],
+    },
+    'Item_1': {
+        'question': "Did the research questions and inclusion criteria include components of PICO? Did this include: "
+                    "Population, Intervention, Comparator and Outcome?",
+        # The abstract usually states the question
+        'lead_chars': 1500,
+        'patterns': [
+            r'\bPI[CE]OS?\b|\bPECOS?\b',
+            r'inclusion criteria|eligibility criteria|eligible (?:studies|trials)|included if|were included',
+            r'research questions?|objectives?\b|we aimed|aims? of (?:this|the) (?:review|study|meta-analysis)',
+        ],
+    },
+}
+INSUFFICIENT = "Insufficient excerpt"
+
+
+def extract_snippets(text, item, window=300, max_chars=2500):
+    """Passages of text around the item's keywords (plus its lead), merged and capped at max_chars"""
+    config = BATCH_ITEMS[item]
+    spans = []
+    if config['lead_chars']:
+        spans.append((0, min(len(text), config['lead_chars'])))
+    budget = max_chars - sum(end - start for start, end in spans)
+    for pattern in config['patterns']:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            if budget <= 0:
+                break
+            start, end = max(0, match.start() - window), min(len(text), match.end() + window)
+            if any(s <= match.start() and match.end() <= e for s, e in spans):
+                continue
+            spans.append((start, end))
+            budget -= end - start
+
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    snippets = " [...] ".join(" ".join(text[start:end].split()) for start, end in merged)
+    return snippets[:max_chars]
+
+
+def build_batch_prompt(item, snippets_by_article):
+    """One prompt assessing a single AMSTAR item for several articles"""
+    config = BATCH_ITEMS[item]
+    excerpts = "\n\n".join(f"=== ARTICLE ID: {article_id} ===\n{snippets}"
+                           for article_id, snippets in snippets_by_article.items())
+    return f"""
+You are conducting an AMSTAR 2 batch assessment of ONE item across several systematic reviews/meta-analyses.
+
+ITEM: {item}
+QUESTION: {config['question']}
+
+Only "Yes" or "No" is possible for this item. Apply exactly the same criteria to every review below and judge
+each review only on its own excerpts. The excerpts are the passages of each review most likely to address this
+item. If a review's excerpts do not contain enough information to decide, answer "{INSUFFICIENT}" and the full
+review will be assessed separately.
+
+Return ONLY a JSON array with one entry per review, in this EXACT format:
+[
+  {{
+    "Article": "<ARTICLE ID>",
+    "Field": "{item}",
+    "Value": "Yes/No. [One or two sentences citing the evidence]"
+  }}
+]
+
+REVIEW EXCERPTS:
+
+{excerpts}
+"""
+
+
+class BatchAmstarAssessor:
+    """Answers the short AMSTAR items for a whole corpus with one request per item and batch of articles"""
+
+    def __init__(self, extractor, items=('Item_16', 'Item_10', 'Item_1'), batch_chars=40000, max_articles=20,
+                 snippet_chars=2500):
+        self.extractor = extractor
+        self.items = list(items)
+        self.batch_chars = batch_chars
+        self.max_articles = max_articles
+        self.snippet_chars = snippet_chars
+        self.stats = {'requests': 0, 'answered': 0, 'insufficient': 0, 'no_snippets': 0, 'missing': 0}
+        self.lock = threading.Lock()
+
+    def batches(self, snippets):
+        """Pack {article: snippets} into batches under batch_chars and max_articles"""
+        batch, size = {}, 0
+        for article_id, text in snippets.items():
+            if batch and (size + len(text) > self.batch_chars or len(batch) >= self.max_articles):
+                yield batch
+                batch, size = {}, 0
+            batch[article_id] = text
+            size += len(text)
+        if batch:
+            yield batch
+
+    def _assess_batch(self, item, batch):
+        tier = self.extractor.router.tier_for(item)
+        # Room for a short answer per article
+        results = self.extractor._make_api_call(build_batch_prompt(item, batch), tier=tier,
+                                                max_tokens=min(8000, 200 * len(batch) + 500))
+        answers = {}
+        insufficient = 0
+        for entry in results if isinstance(results, list) else []:
+            if not isinstance(entry, dict) or entry.get('Article') not in batch:
+                continue
+            valid, _ = validate_amstar([entry], [item])
+            if valid:
+                answers[entry['Article']] = valid[0]['Value']
+            elif str(entry.get('Value', '')).startswith(INSUFFICIENT):
+                insufficient += 1
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['answered'] += len(answers)
+            self.stats['insufficient'] += insufficient
+            self.stats['missing'] += len(batch) - len(answers)
+        return item, answers
+
+    def assess(self, texts):
+        """
+        texts: {article_id: text} (main article plus any supplement/protocol).
+        Returns {article_id: {"Item_N": value}} for the items that could be decided in batch.
+        """
+        jobs = []
+        for item in self.items:
+            snippets = {}
+            for article_id, text in texts.items():
+                snippet = extract_snippets(text, item, max_chars=self.snippet_chars)
+                if snippet:
+                    snippets[article_id] = snippet
+                else:
+                    self.stats['no_snippets'] += 1
+            jobs += [(item, batch) for batch in self.batches(snippets)]
+
+        print(f"Assessing {', '.join(self.items)} for {len(texts)} articles in {len(jobs)} batched requests...")
+        answers = {}
+        with ThreadPoolExecutor(max_workers=self.extractor.max_parallel_calls) as executor:
+            for item, item_answers in executor.map(lambda job: self._assess_batch(*job), jobs):
+                for article_id, value in item_answers.items():
+                    answers.setdefault(article_id, {})[item] = value
+        return answers
+
+    def report(self):
+        s = self.stats
+        return (f"BATCHED AMSTAR ITEMS: {s['requests']} requests, {s['answered']} answers, "
+                f"{s['insufficient']} inconclusive, {s['no_snippets']} without snippets, "
+                f"{s['missing']} left to the per-article assessment")
+
+
+def load_article_texts(paths, extractor):
+    """{article_id: main text plus supplement/protocol} for snippet extraction"""
+    texts = {}
+    for path in paths:
+        article_id = os.path.splitext(os.path.basename(path))[0]
+        text = read_article(path, extractor.store)
+        supp_content, protocol_content = extractor.load_supplement_files(path)
+        texts[article_id] = "\n\n".join(part for part in (text, supp_content, protocol_content) if part)
+    return texts
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    from article_store import ArticleStore
+    from data_extraction_AMSTAR import DualExtractionAPI, my_key
+    from results_store import ResultsStore, is_results_db
+
+    parser = argparse.ArgumentParser(description="Assess short AMSTAR items across many articles in batched calls")
+    parser.add_argument("articles", nargs="+", help="Article files or glob patterns")
+    parser.add_argument("--qc", help="QC sheet CSV (needed unless --update-existing)")
+    parser.add_argument("--results", required=True, help="Results database (.db) or directory for per-article CSVs")
+    parser.add_argument("--items", nargs="+", choices=list(BATCH_ITEMS), default=['Item_16', 'Item_10', 'Item_1'],
+                        help="Items to assess in batch")
+    parser.add_argument("--store", help="Article store path prefix")
+    parser.add_argument("--max-articles", type=int, default=20, help="Articles per batched request")
+    parser.add_argument("--update-existing", action="store_true",
+                        help="Only rewrite these items in an existing results database and recompute ratings")
+    args = parser.parse_args()
+
+    if args.update_existing and not is_results_db(args.results):
+        parser.error("--update-existing needs a results database (.db)")
+    if not args.update_existing and not args.qc:
+        parser.error("--qc is required unless --update-existing")
+
+    paths = [p for pattern in args.articles for p in (sorted(glob.glob(pattern)) or [pattern])]
+    store = ArticleStore(args.store) if args.store and ArticleStore.exists(args.store) else None
+    extractor = DualExtractionAPI(my_key, store=store)
+    assessor = BatchAmstarAssessor(extractor, args.items, max_articles=args.max_articles)
+    answers = assessor.assess(load_article_texts(paths, extractor))
+    print(assessor.report())
+
+    if args.update_existing:
+        with ResultsStore(args.results) as results_store:
+            for article_id, items in answers.items():
+                results_store.update_items(article_id, items, datetime.now().isoformat())
+            ratings = results_store.recompute_ratings(write=True)
+        print(f"Updated {len(answers)} articles; ratings recomputed for {len(ratings)}")
+    else:
+        for path in paths:
+            article_id = os.path.splitext(os.path.basename(path))[0]
+            print(f"\nProcessing {article_id}...")
+            article_text = read_article(path, extractor.store)
+            results = extractor.process_article_with_qc_sheet(article_text, args.qc, path, answers.get(article_id))
+            output = args.results if is_results_db(args.results) else os.path.join(args.results, f"{article_id}.csv")
+            extractor.save_results(results, output, article_id=article_id)
+    print(extractor.router.report())
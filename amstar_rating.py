@@ -0,0 +1,73 @@
+"""
+AMSTAR 2 overall confidence rules, shared by the per-article calculation and
+the corpus-wide (vectorized) recomputation over the results store.
+"""
+
+import re
+
+# Critical domains (items 2, 4, 7, 9, 11, 13, 15)
+CRITICAL_DOMAINS = {
+    'Item_2': 2,   # Protocol registered before commencement
+    'Item_4': 4,   # Adequacy of literature search
+    'Item_7': 7,   # Justification for excluding studies
+    'Item_9': 9,   # Risk of bias from individual studies
+    'Item_11': 11, # Appropriateness of meta-analytical methods
+    'Item_13': 13, # Consideration of risk of bias when interpreting
+    'Item_15': 15  # Assessment of publication bias
+}
+NON_CRITICAL_ITEMS = ['Item_1', 'Item_3', 'Item_5', 'Item_6', 'Item_8', 'Item_10', 'Item_12', 'Item_14', 'Item_16']
+
+RATING_DESCRIPTIONS = {
+    "HIGH": "No or one non-critical weakness: the systematic review provides an accurate and comprehensive summary of the results of the available studies that address the question of interest",
+    "MODERATE": "More than one non-critical weakness: the systematic review has more than one weakness but no critical flaws. It may provide an accurate summary of the results of the available studies that were included in the review",
+    "LOW": "One critical flaw with or without non-critical weaknesses: the review has a critical flaw and may not provide an accurate and comprehensive summary of the available studies that address the question of interest",
+    "CRITICALLY LOW": "More than one critical flaw with or without non-critical weaknesses: the review has more than one critical flaw and should not be relied on to provide an accurate and comprehensive summary of the available studies",
+}
+
+# Leading answer of a Value such as "Partial Yes. The authors searched ..."
+ANSWER_PATTERN = r'^\s*(partial yes|not applicable|yes|no)\b'
+_ANSWER_RE = re.compile(ANSWER_PATTERN, re.IGNORECASE)
+
+
+def is_flaw(value):
+    """A "No" or "Partial Yes" answer counts as a flaw (critical) or weakness (non-critical)"""
+    match = _ANSWER_RE.match(value or "")
+    return bool(match) and match.group(1).lower() in ('no', 'partial yes')
+
+
+def overall_rating(critical_flaws, non_critical_weaknesses):
+    """Overall confidence rating from the flaw/weakness counts"""
+    if critical_flaws == 0:
+        return "HIGH" if non_critical_weaknesses <= 1 else "MODERATE"
+    if critical_flaws == 1:
+        return "LOW"
+    return "CRITICALLY LOW"
+
+
+def rate_items(items):
+    """
+    Vectorized rating for many articles at once.
+
+    items: DataFrame indexed by article with Item_1..Item_16 columns holding the Value text
+    (missing columns/cells count as not flawed). Returns critical_flaws,
+    non_critical_weaknesses and overall_rating per article.
+    """
+    import numpy as np
+    import pandas as pd
+
+    items = items.reindex(columns=list(CRITICAL_DOMAINS) + NON_CRITICAL_ITEMS)
+    answers = items.apply(lambda col: col.astype('string').str.extract(ANSWER_PATTERN, flags=re.IGNORECASE)[0].str.lower())
+    flaws = answers.isin(['no', 'partial yes'])
+
+    critical = flaws[list(CRITICAL_DOMAINS)].sum(axis=1)
+    weaknesses = flaws[NON_CRITICAL_ITEMS].sum(axis=1)
+    rating = np.select(
+        [critical > 1, critical == 1, weaknesses > 1],
+        ["CRITICALLY LOW", "LOW", "MODERATE"],
+        default="HIGH",
+    )
+    return pd.DataFrame({
+        'critical_flaws': critical.astype(int),
+        'non_critical_weaknesses': weaknesses.astype(int),
+        'overall_rating': rating,
+    }, index=items.index)
@@ -0,0 +1,234 @@
+"""
+Indexed, memory-mapped corpus store for article, supplement and protocol texts.
+
+All texts live in one concatenated UTF-8 file with a JSON index of byte offsets
+per article id (the file stem), so lookups are a dict access and slices are
+zero-copy memoryviews instead of repeated open()/read() and os.path.exists probes.
+"""
+
+import json
+import mmap
+import os
+from pathlib import Path
+
+from document_text import convert_files
+
+# Same lookup order as DualExtractionAPI.load_supplement_files
+COMPANION_EXTENSIONS = ['.txt', '.pdf', '.docx', '']
+PARTS = ('main', 'supplement', 'protocol')
+# part -> folder next to the article and file-name suffix
+COMPANIONS = (('supplement', 'Supplements', '_supp'), ('protocol', 'Protocols', '_protocol'))
+
+
+def _list_dir(directory):
+    """Return the set of file names in directory (empty if it does not exist)"""
+    try:
+        return {entry.name for entry in os.scandir(directory) if entry.is_file()}
+    except FileNotFoundError:
+        return set()
+
+
+def companion_names(base_name, suffix, extensions=COMPANION_EXTENSIONS):
+    """Candidate companion file names in lookup order, e.g. <base>_supp.txt, <base>_supp.pdf, ..."""
+    return [f"{base_name}{suffix}{ext}" for ext in extensions]
+
+
+def find_companion(base_name, folder, suffix, listing, extensions=COMPANION_EXTENSIONS):
+    """Find e.g. Supplements/<base>_supp.txt using a pre-listed directory instead of exists() probes"""
+    for name in companion_names(base_name, suffix, extensions):
+        if name in listing:
+            return os.path.join(folder, name)
+    return None
+
+
+def read_text(path):
+    """Read a source file the way the extraction scripts always have"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def read_article(path, store=None):
+    """Main text of an article file, served from store when its entry is up to date"""
+    article_id = Path(path).stem
+    if store is not None and article_id in store and store.is_current(article_id):
+        return store.text(article_id)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class ArticleStore:
+    """Read-only view over a built corpus: store_path + '.corpus' and store_path + '.index.json'"""
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+        with open(f"{store_path}.index.json", 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self._file = open(f"{store_path}.corpus", 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+        # folder -> (mtime_ns, file names), re-listed only when the folder changes
+        self._listings = {}
+
+    @classmethod
+    def build(cls, article_paths, store_path, workers=None):
+        """Concatenate every article and its supplement/protocol into one file and write the offset index"""
+        listings = {}
+        plan = []
+        for article_path in article_paths:
+            article_id = Path(article_path).stem
+            base_dir = os.path.dirname(article_path)
+            sources = {'main': article_path}
+            for part, folder_name, suffix in COMPANIONS:
+                folder = os.path.join(base_dir, folder_name)
+                if folder not in listings:
+                    listings[folder] = _list_dir(folder)
+                sources[part] = find_companion(article_id, folder, suffix, listings[folder])
+            plan.append((article_id, sources))
+
+        # Convert supplement/protocol PDFs and DOCX files across a process pool (cached by file hash)
+        companions = [source for _, sources in plan for part, source in sources.items()
+                      if part != 'main' and source is not None]
+        converted = convert_files(companions, workers=workers)
+
+        index = {}
+        tmp_corpus = f"{store_path}.corpus.tmp"
+        offset = 0
+        with open(tmp_corpus, 'wb') as out:
+            for article_id, sources in plan:
+                base_dir = os.path.dirname(sources['main'])
+                # Companion names that would replace what was indexed, so is_current can notice a
+                # supplement/protocol arriving after the build without invalidating the whole folder
+                entry = {'path': sources['main'], 'candidates': {}}
+                for part, folder_name, suffix in COMPANIONS:
+                    names = companion_names(article_id, suffix)
+                    if sources[part] is not None:
+                        names = names[:names.index(os.path.basename(sources[part]))]
+                    entry['candidates'][part] = [os.path.join(base_dir, folder_name), names]
+                for part, source in sources.items():
+                    if source is None:
+                        continue
+                    if part == 'main':
+                        try:
+                            text = read_text(source)
+                        except Exception as e:
+                            print(f"  ✗ Error reading {source}: {e}")
+                            continue
+                    elif source in converted:
+                        text = converted[source]
+                    else:
+                        continue
+                    data = text.encode('utf-8')
+                    out.write(data)
+                    stat = os.stat(source)
+                    entry[part] = {
+                        'source': source,
+                        'offset': offset,
+                        'nbytes': len(data),
+                        'length': len(text),
+                        'mtime_ns': stat.st_mtime_ns,
+                        'size': stat.st_size,
+                    }
+                    offset += len(data)
+
+                if 'main' in entry:
+                    index[article_id] = entry
+
+        tmp_index = f"{store_path}.index.json.tmp"
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        # Swap corpus before index so a crash never leaves an index pointing past the corpus end
+        os.replace(tmp_corpus, f"{store_path}.corpus")
+        os.replace(tmp_index, f"{store_path}.index.json")
+        print(f"Built article store '{store_path}' with {len(index)} articles ({offset:,} bytes)")
+        return cls(store_path)
+
+    @classmethod
+    def exists(cls, store_path):
+        return os.path.exists(f"{store_path}.index.json") and os.path.exists(f"{store_path}.corpus")
+
+    def close(self):
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, article_id):
+        return article_id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def ids(self):
+        return list(self.index)
+
+    def has(self, article_id, part='main'):
+        return part in self.index.get(article_id, {})
+
+    def length(self, article_id, part='main'):
+        """Character length of a part (0 if missing), without touching the corpus file"""
+        meta = self.index.get(article_id, {}).get(part)
+        return meta['length'] if meta else 0
+
+    def view(self, article_id, part='main'):
+        """Zero-copy memoryview of the UTF-8 bytes for a part (empty if missing)"""
+        meta = self.index.get(article_id, {}).get(part)
+        if not meta:
+            return memoryview(b"")
+        return self._view[meta['offset']:meta['offset'] + meta['nbytes']]
+
+    def text(self, article_id, part='main'):
+        """Decoded text of a part ('' if missing)"""
+        return str(self.view(article_id, part), 'utf-8')
+
+    def _listing(self, folder):
+        """File names in folder, listed once per folder modification"""
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+        except FileNotFoundError:
+            return set()
+        cached = self._listings.get(folder)
+        if cached is None or cached[0] != mtime_ns:
+            cached = (mtime_ns, _list_dir(folder))
+            self._listings[folder] = cached
+        return cached[1]
+
+    def is_current(self, article_id):
+        """True if no indexed source file for this article has changed (or newly appeared) since the build"""
+        entry = self.index.get(article_id, {})
+        candidates = entry.get('candidates', {})
+        for part in PARTS:
+            if part in candidates:
+                folder, names = candidates[part]
+                if names and not self._listing(folder).isdisjoint(names):
+                    return False
+            meta = entry.get(part)
+            if not meta:
+                continue
+            try:
+                stat = os.stat(meta['source'])
+            except FileNotFoundError:
+                return False
+            if stat.st_mtime_ns != meta['mtime_ns'] or stat.st_size != meta['size']:
+                return False
+        return True
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Build a memory-mapped article store from a directory of .txt articles")
+    parser.add_argument("input", help="Article directory (with optional Supplements/ and Protocols/ folders)")
+    parser.add_argument("store", help="Store path prefix; writes <store>.corpus and <store>.index.json")
+    parser.add_argument("--pattern", default="*.txt", help="File pattern for articles (default: *.txt)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for PDF/DOCX conversion (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.input, args.pattern)))
+    ArticleStore.build(paths, args.store, workers=args.workers).close()
@@ -0,0 +1,203 @@
+"""
+Offline throughput benchmark for DualExtractionAPI and summarize_articles.py.
+
+Starts the local mock Messages API (mock_claude_server.py), builds a synthetic
+corpus of articles, supplements, protocols and a QC sheet, then drives the real
+entry points against the stub and reports articles/minute, wall time and retries.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from mock_claude_server import MockClaudeServer
+from study_field_groups import FieldStats
+
+STUDY_FIELDS = [
+    "Country of corresponding author",
+    "Eating disorder of focus",
+    "Population characteristics",
+    "Number of included studies",
+    "Total sample size",
+    "Primary outcome",
+    "Focus and main finding for outcome 1",
+    "Focus and main finding for outcome 2",
+    "Focus and main finding for outcome 3",
+    "Effect size and confidence interval",
+]
+
+AMSTAR_FIELDS = [
+    "Item_1 PICO components", "Item_2 protocol prior", "Item_3 study design selection",
+    "Item_4 comprehensive search", "Item_5 selection duplicate", "Item_6 extraction duplicate",
+    "Item_7 excluded studies justify", "Item_8 adequate detail", "Item_9 risk of bias individual",
+    "Item_10 funding sources", "Item_11 appropriate statistical", "Item_12 impact risk of bias",
+    "Item_13 account risk of bias", "Item_14 heterogeneity explanation",
+    "Item_15 publication bias investigation", "Item_16 conflict interest",
+]
+
+FILLER = (
+    "This systematic review and meta-analysis examined outcomes in eating disorders. "
+    "Databases were searched and two reviewers screened records independently. "
+    "Pooled effect sizes were estimated with random-effects models (SMD 0.42, 95% CI 0.21 to 0.63). "
+    "The authors declare no competing interests; funding sources of the included trials were not reported. "
+)
+
+
+def build_corpus(root, n_articles, article_chars=20000, supplement_rate=0.5, protocol_rate=0.3, seed=0):
+    """Write a synthetic corpus and QC sheet under root and return (article paths, QC csv path)"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "Supplements"), exist_ok=True)
+    os.makedirs(os.path.join(root, "Protocols"), exist_ok=True)
+
+    body = (FILLER * (article_chars // len(FILLER) + 1))[:article_chars]
+    paths = []
+    for i in range(1, n_articles + 1):
+        name = f"article_{i:05d}"
+        path = os.path.join(root, f"{name}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Article {i}\n{body}")
+        if rng.random() < supplement_rate:
+            with open(os.path.join(root, "Supplements", f"{name}_supp.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Supplement for article {i}\n{body[:article_chars // 4]}")
+        if rng.random() < protocol_rate:
+            with open(os.path.join(root, "Protocols", f"{name}_protocol.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Protocol for article {i}\n{body[:article_chars // 8]}")
+        paths.append(path)
+
+    qc_rows = [{"Section": "AMSTAR2_Items", "Field": field} for field in AMSTAR_FIELDS]
+    qc_rows += [{"Section": "Study_Data", "Field": field} for field in STUDY_FIELDS]
+    qc_path = os.path.join(root, "DataExtract_QC.csv")
+    pd.DataFrame(qc_rows).to_csv(qc_path, index=False)
+    return paths, qc_path
+
+
+def bench_extraction(server, article_paths, qc_path, out_dir, retry_wait=0.1, batch_items=None):
+    """Run DualExtractionAPI end to end for each article and return timing stats"""
+    from amstar_batch import BatchAmstarAssessor, load_article_texts
+    from data_extraction_AMSTAR import DualExtractionAPI
+
+    extractor = DualExtractionAPI("benchmark", base_url=server.messages_url)
+    extractor.between_calls_wait = 0
+    extractor.after_calls_wait = 0
+    extractor.retry_wait = retry_wait
+    extractor.field_stats = FieldStats(os.path.join(out_dir, "field_output_stats.json"))
+
+    failed = 0
+    start = time.perf_counter()
+    preassessed = {}
+    if batch_items:
+        assessor = BatchAmstarAssessor(extractor, batch_items)
+        preassessed = assessor.assess(load_article_texts(article_paths, extractor))
+    for path in article_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            article_text = f.read()
+        article_id = os.path.splitext(os.path.basename(path))[0]
+        results = extractor.process_article_with_qc_sheet(article_text, qc_path, path, preassessed.get(article_id))
+        output_file = os.path.join(out_dir, os.path.basename(path).replace(".txt", ".csv"))
+        extractor.save_results(results, output_file)
+        if any(r['Value'].startswith(("AMSTAR assessment needed", "Study data needed")) for r in results):
+            failed += 1
+    wall = time.perf_counter() - start
+
+    return {
+        'articles': len(article_paths),
+        'wall_time_s': wall,
+        'articles_per_minute': len(article_paths) / wall * 60 if wall else 0.0,
+        'client_retries': extractor.retry_count,
+        'articles_with_missing_fields': failed,
+        'routing': extractor.router.report(),
+    }
+
+
+def bench_summarize(server, article_paths, max_chars=100000, max_retries=5):
+    """Run summarize_articles.analyze_article_cluster over the corpus and return timing stats"""
+    import anthropic
+    import summarize_articles
+
+    summarize_articles.client = anthropic.Anthropic(api_key="benchmark", base_url=server.base_url,
+                                                    max_retries=max_retries)
+    start = time.perf_counter()
+    result = summarize_articles.analyze_article_cluster(article_paths, cluster_name="benchmark", max_chars=max_chars)
+    wall = time.perf_counter() - start
+
+    return {
+        'articles': len(article_paths),
+        'wall_time_s': wall,
+        'articles_per_minute': len(article_paths) / wall * 60 if wall else 0.0,
+        'error_in_result': result.startswith("Error"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction scripts against a local mock Claude API")
+    parser.add_argument("--articles", type=int, default=20, help="Number of synthetic articles (default: 20)")
+    parser.add_argument("--article-chars", type=int, default=20000, help="Characters per synthetic article")
+    parser.add_argument("--mode", choices=["extraction", "summarize", "both"], default="both")
+    parser.add_argument("--latency", default="uniform:0.02,0.1", help="Mock latency distribution")
+    parser.add_argument("--rate-429", type=float, default=0.05, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-529", type=float, default=0.02, help="Fraction of requests answered with 529")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of replies cut off mid-JSON")
+    parser.add_argument("--fence-rate", type=float, default=0.2, help="Fraction of replies wrapped in ```json fences")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for corpus and mock faults")
+    parser.add_argument("--batch-items", nargs="+", choices=["Item_16", "Item_10", "Item_1"],
+                        help="Assess these AMSTAR items across articles in batched calls first (see amstar_batch.py)")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the scripts' own progress output")
+    args = parser.parse_args()
+
+    report = {'config': vars(args)}
+    with tempfile.TemporaryDirectory() as root:
+        article_paths, qc_path = build_corpus(root, args.articles, args.article_chars, seed=args.seed)
+        out_dir = os.path.join(root, "results")
+        os.makedirs(out_dir)
+
+        modes = ["extraction", "summarize"] if args.mode == "both" else [args.mode]
+        for mode in modes:
+            server = MockClaudeServer(latency=args.latency, rate_429=args.rate_429, rate_529=args.rate_529,
+                                      truncate_rate=args.truncate_rate, fence_rate=args.fence_rate, seed=args.seed)
+            with server:
+                sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+                with sink:
+                    if mode == "extraction":
+                        stats = bench_extraction(server, article_paths, qc_path, out_dir, batch_items=args.batch_items)
+                    else:
+                        stats = bench_summarize(server, article_paths)
+                stats['server'] = dict(server.stats)
+                # Every injected error that was followed by another request was retried
+                stats['server_retries'] = server.stats['injected_429'] + server.stats['injected_529']
+            report[mode] = stats
+
+    for mode in ("extraction", "summarize"):
+        if mode not in report:
+            continue
+        stats = report[mode]
+        print(f"\n=== {mode.upper()} ===")
+        print(f"Articles: {stats['articles']}")
+        print(f"Wall time: {stats['wall_time_s']:.2f} s")
+        print(f"Throughput: {stats['articles_per_minute']:.1f} articles/minute")
+        print(f"API requests: {stats['server']['requests']} (retries: {stats['server_retries']})")
+        print(f"Injected 429/529: {stats['server']['injected_429']}/{stats['server']['injected_529']}")
+        print(f"Truncated/fenced replies: {stats['server']['truncated']}/{stats['server']['fenced']}")
+        if mode == "extraction":
+            print(f"Articles with missing fields: {stats['articles_with_missing_fields']}")
+            print(stats['routing'])
+        elif stats['error_in_result']:
+            print("Summary result was an error message (run with --verbose for details)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Stage-by-stage benchmark of the topic-modeling pipeline in topic_modeling_script.py.
+
+Runs embedding, UMAP, KMeans, c-TF-IDF, KeyBERT representation and gensim
+coherence on synthetic or sampled abstract sets of increasing size. Each corpus
+size runs in a fresh process; per stage we record wall time, peak RSS and a
+cProfile dump, then print a scaling table (also written as CSV).
+"""
+
+import argparse
+import cProfile
+import multiprocessing as mp
+import os
+import pstats
+from queue import Empty
+import random
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+
+STAGES = ["embedding", "umap", "kmeans", "ctfidf", "keybert", "coherence"]
+
+TOPIC_VOCAB = [
+    ["anorexia", "weight", "restriction", "bmi", "inpatient", "refeeding", "adolescents"],
+    ["bulimia", "binge", "purging", "compensatory", "episodes", "frequency", "remission"],
+    ["cognitive", "behavioral", "therapy", "cbt", "treatment", "trial", "outcome"],
+    ["mortality", "risk", "cohort", "hazard", "death", "suicide", "follow"],
+    ["body", "image", "dissatisfaction", "media", "appearance", "self", "esteem"],
+    ["genetic", "heritability", "twin", "polygenic", "variants", "association", "loci"],
+    ["prevalence", "lifetime", "population", "epidemiology", "incidence", "survey", "estimates"],
+    ["neural", "reward", "fmri", "brain", "activation", "circuits", "imaging"],
+]
+COMMON_WORDS = ["the", "of", "and", "in", "with", "patients", "studies", "meta", "analysis",
+                "review", "systematic", "eating", "disorders", "results", "significant", "effect"]
+
+
+def synthetic_abstracts(n, words_per_abstract=180, seed=0):
+    """Generate n abstracts that each mix one dominant topic vocabulary with common words"""
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n):
+        topic = rng.choice(TOPIC_VOCAB)
+        other = rng.choice(TOPIC_VOCAB)
+        words = [rng.choice(topic) if rng.random() < 0.4 else
+                 rng.choice(other) if rng.random() < 0.2 else
+                 rng.choice(COMMON_WORDS)
+                 for _ in range(words_per_abstract)]
+        docs.append(" ".join(words))
+    return docs
+
+
+def sampled_abstracts(csv_path, n, seed=0):
+    """Sample n abstracts (with replacement when n exceeds the file) from a CSV with an Abstract column"""
+    abstracts = pd.read_csv(csv_path)["Abstract"].dropna().astype(str).tolist()
+    rng = random.Random(seed)
+    if n <= len(abstracts):
+        return rng.sample(abstracts, n)
+    return [rng.choice(abstracts) for _ in range(n)]
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter for this process (Linux only); return False if unsupported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if os.uname().sysname == "Darwin" else rss / 1024
+
+
+class StageTimer:
+    """Run one pipeline stage under cProfile and record wall time and peak RSS"""
+
+    def __init__(self, size, profile_dir):
+        self.size = size
+        self.profile_dir = profile_dir
+        self.rows = []
+
+    def run(self, stage, func, *args, **kwargs):
+        print(f"  [{self.size}] {stage}...", flush=True)
+        reset_peak_rss()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        result = func(*args, **kwargs)
+        profiler.disable()
+        wall = time.perf_counter() - start
+
+        profile_path = None
+        if self.profile_dir:
+            profile_path = os.path.join(self.profile_dir, f"{self.size}_{stage}.prof")
+            profiler.dump_stats(profile_path)
+        top = pstats.Stats(profiler).sort_stats("cumulative")
+        top_call = next((f"{func_name[2]} ({func_name[0]}:{func_name[1]})"
+                         for func_name in top.fcn_list if "benchmark_topic_modeling" not in func_name[0]), "")
+
+        self.rows.append({
+            'size': self.size,
+            'stage': stage,
+            'wall_time_s': round(wall, 3),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'top_cumulative_call': top_call,
+            'profile': profile_path,
+        })
+        print(f"  [{self.size}] {stage}: {wall:.2f} s, peak RSS {self.rows[-1]['peak_rss_mb']:.0f} MB", flush=True)
+        return result
+
+
+def embed(docs, model_name, batch_size, backend="torch", threads=None):
+    if model_name == "random":
+        # Skips the encoder so downstream stages can be timed without a model download
+        rng = np.random.default_rng(0)
+        return rng.standard_normal((len(docs), 384)).astype(np.float32)
+    from embedding_backend import EmbeddingBackend
+    return EmbeddingBackend(model_name, backend, batch_size, threads).encode(docs)
+
+
+def umap_model():
+    from umap import UMAP
+    return UMAP(n_neighbors=15, n_components=4, min_dist=0.0, metric='cosine', random_state=42)
+
+
+def warm_up_umap(dim):
+    """Fit UMAP on a tiny random array so numba's JIT compilation is not counted in the timed stage"""
+    rng = np.random.default_rng(0)
+    umap_model().fit_transform(rng.standard_normal((64, dim)).astype(np.float32))
+
+
+def reduce(embeddings):
+    return umap_model().fit_transform(embeddings)
+
+
+def cluster(reduced, k, ks=None, method="kmeans"):
+    """Labels for k, clustering every k in ks (default just k) in one sweep as the topic script does"""
+    from topic_clustering import sweep_clusters
+    return sweep_clusters(reduced, sorted(set(ks or []) | {k}), method=method, seed=42)[k]
+
+
+def fit_ctfidf(docs, reduced, labels):
+    """Fit BERTopic on precomputed reduced embeddings and labels so only the c-TF-IDF step is timed"""
+    from bertopic import BERTopic
+    from bertopic.cluster import BaseCluster
+    from bertopic.dimensionality import BaseDimensionalityReduction
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    class PrecomputedCluster(BaseCluster):
+        def fit(self, X, y=None):
+            self.labels_ = np.asarray(labels)
+            return self
+
+    topic_model = BERTopic(
+        embedding_model=None,
+        umap_model=BaseDimensionalityReduction(),
+        hdbscan_model=PrecomputedCluster(),
+        vectorizer_model=CountVectorizer(stop_words="english", min_df=2, ngram_range=(1, 2)),
+        top_n_words=20,
+    )
+    topic_model.fit(docs, reduced)
+    return topic_model
+
+
+def keybert(topic_model, docs, model_name):
+    """Recompute topic representations with KeyBERTInspired (includes its c-TF-IDF candidate step)"""
+    from bertopic.representation import KeyBERTInspired
+    from sentence_transformers import SentenceTransformer
+    topic_model.embedding_model = SentenceTransformer(model_name)
+    topic_model.update_topics(docs, representation_model=KeyBERTInspired())
+    return topic_model
+
+
+def coherence(topic_model, docs):
+    from gensim.corpora import Dictionary
+    from gensim.models import CoherenceModel
+    from topic_modeling_script import bertopic_to_gensim_format
+
+    topic_words = bertopic_to_gensim_format(topic_model, docs)
+    processed_docs = [doc.lower().split() for doc in docs]
+    dictionary = Dictionary(processed_docs)
+    return CoherenceModel(topics=topic_words, texts=processed_docs, dictionary=dictionary,
+                          coherence='u_mass').get_coherence()
+
+
+def run_size(size, args, queue):
+    """Run every requested stage for one corpus size and put the result rows on the queue"""
+    if args.abstracts:
+        docs = sampled_abstracts(args.abstracts, size, seed=args.seed)
+    else:
+        docs = synthetic_abstracts(size, seed=args.seed)
+
+    timer = StageTimer(size, args.profile_dir)
+    stages = set(args.stages)
+    try:
+        embeddings = timer.run("embedding", embed, docs, args.embedding_model, args.batch_size,
+                                   args.embedding_backend, args.threads) \
+            if "embedding" in stages else embed(docs, "random", args.batch_size)
+        if "umap" in stages:
+            # Each size runs in a fresh process, so compile first or every row includes the JIT
+            warm_up_umap(embeddings.shape[1])
+            reduced = timer.run("umap", reduce, embeddings)
+        else:
+            reduced = embeddings[:, :4]
+        labels = timer.run("kmeans", cluster, reduced, args.k, args.ks, args.cluster_method) \
+            if "kmeans" in stages else cluster(reduced, args.k)
+        topic_model = None
+        if stages & {"ctfidf", "keybert", "coherence"}:
+            topic_model = timer.run("ctfidf", fit_ctfidf, docs, reduced, labels) \
+                if "ctfidf" in stages else fit_ctfidf(docs, reduced, labels)
+        if "keybert" in stages:
+            if args.embedding_model == "random":
+                print(f"  [{size}] keybert: skipped (needs a real embedding model)")
+            else:
+                timer.run("keybert", keybert, topic_model, docs, args.embedding_model)
+        if "coherence" in stages:
+            timer.run("coherence", coherence, topic_model, docs)
+    except MemoryError:
+        print(f"  [{size}] ran out of memory")
+    queue.put(timer.rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the topic-modeling pipeline stage by stage")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Corpus sizes to run (default: 1000 10000 100000)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to time")
+    parser.add_argument("--abstracts", help="CSV with an Abstract column to sample from (default: synthetic)")
+    parser.add_argument("--embedding-model", default="pritamdeka/S-PubMedBert-MS-MARCO",
+                        help="Sentence-transformer model, or 'random' to skip encoding")
+    parser.add_argument("--embedding-backend", choices=["torch", "onnx", "onnx-int8"], default="torch",
+                        help="Encoder runtime (see embedding_backend.py)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Encoding batch size")
+    parser.add_argument("--threads", type=int, help="CPU threads for the encoder")
+    parser.add_argument("-k", type=int, default=10, help="Number of clusters used for the later stages")
+    parser.add_argument("--ks", type=int, nargs="+", help="Time a sweep over these k values in the kmeans stage")
+    parser.add_argument("--cluster-method", choices=["kmeans", "minibatch", "hierarchical"], default="kmeans",
+                        help="Sweep method (see topic_clustering.py)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for corpus generation/sampling")
+    parser.add_argument("--profile-dir", default="topic_benchmark_profiles", help="Directory for cProfile dumps")
+    parser.add_argument("--output", default="topic_benchmark.csv", help="Scaling table CSV")
+    args = parser.parse_args()
+
+    if args.profile_dir:
+        os.makedirs(args.profile_dir, exist_ok=True)
+
+    rows = []
+    ctx = mp.get_context("spawn")
+    for size in args.sizes:
+        print(f"Running corpus size {size}...")
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_size, args=(size, args, queue))
+        proc.start()
+        size_rows = []
+        # Poll so a child killed by the OOM killer does not leave us blocked on the queue
+        while proc.is_alive() or not queue.empty():
+            try:
+                size_rows = queue.get(timeout=1)
+                break
+            except Empty:
+                continue
+        proc.join()
+        if proc.exitcode != 0:
+            print(f"  size {size} exited with code {proc.exitcode}")
+        rows.extend(size_rows)
+
+    if not rows:
+        print("No stages completed.")
+        return None
+
+    table = pd.DataFrame(rows)
+    table.to_csv(args.output, index=False)
+
+    print("\nSCALING TABLE (wall time s / peak RSS MB):")
+    wall = table.pivot(index="stage", columns="size", values="wall_time_s")
+    rss = table.pivot(index="stage", columns="size", values="peak_rss_mb")
+    order = [s for s in STAGES if s in wall.index]
+    print(wall.loc[order].to_string())
+    print()
+    print(rss.loc[order].to_string())
+    print(f"\nTable saved to {args.output}; profiles in {args.profile_dir}/")
+    return table
+
+
+if __name__ == "__main__":
+    main()
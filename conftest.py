@@ -0,0 +1 @@
+# The scripts are top-level modules in the repository root; this file makes pytest put the root on sys.path
@@ -4,33 +4,61 @@ API Call to Claude - conducts AMSTAR assessment + Study Data extraction (Enhance
 
 import requests
 import json
-import pandas as pd
 from datetime import datetime
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
 import os
 
-article=sys.argv[1]
-# Get article path from command line
-my_key=$ANTHROPIC_KEY
+from article_store import ArticleStore, read_article
+from document_text import load_document
+from qc_schema import QCSchema, is_amstar_field, load_qc_schema
+from study_field_groups import DEFAULT_STATS_PATH, FieldStats, group_fields
+from model_routing import ModelRouter, validate_amstar, validate_study
+from amstar_rating import CRITICAL_DOMAINS, NON_CRITICAL_ITEMS, RATING_DESCRIPTIONS, is_flaw, overall_rating
 
-file_name=sys.argv[2]
+my_key=os.environ.get("ANTHROPIC_KEY", "")
 
 class DualExtractionAPI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = "https://api.anthropic.com/v1/messages", store: ArticleStore = None,
+                 router: ModelRouter = None, field_stats_path: str = DEFAULT_STATS_PATH):
         self.api_key = api_key
-        self.base_url = "https://api.anthropic.com/v1/messages"
+        self.base_url = base_url
+        self.store = store
+        self.router = router or ModelRouter.from_env()
         self.headers = {
             "Content-Type": "application/json",
-            "x-api-key": my_key,
+            "x-api-key": api_key,
             "anthropic-version": "2023-06-01"
         }
+        # Waits (seconds) between calls and before rate-limit retries; the benchmark shortens these
+        self.between_calls_wait = 60
+        self.after_calls_wait = 5
+        self.retry_wait = 30
+        self.retry_count = 0
+        self.lock = threading.Lock()
+        # Study fields are sharded into groups of about this many expected output characters
+        self.study_group_chars = 6000
+        self.max_parallel_calls = 4
+        # With batched (preassessed) AMSTAR items, up to this many remaining cheap-tier items are asked in the
+        # escalation-tier call instead of their own request; 0 keeps every item on its routed tier
+        self.fold_max_items = 5
+        self.field_stats = FieldStats(field_stats_path)
+        # Optional shared request budget (e.g. work_queue.QueueRateLimiter); acquire() blocks until a request may be sent
+        self.rate_limiter = None
+        # Journal mode for a results database (see ResultsStore); queue workers use the rollback journal
+        self.results_journal_mode = None
 
     def load_supplement_files(self, article_path):
         """Load supplement and protocol files if they exist"""
         base_name = os.path.splitext(os.path.basename(article_path))[0]
         base_dir = os.path.dirname(article_path)
         
+        # Served from the article store without probing the filesystem when it is up to date
+        if self.store is not None and base_name in self.store and self.store.is_current(base_name):
+            return self.store.text(base_name, 'supplement'), self.store.text(base_name, 'protocol')
+        
         # Try different extensions for supplement file
         supp_content = ""
         supp_extensions = ['.txt', '.pdf', '.docx', '']
@@ -38,11 +66,11 @@ class DualExtractionAPI:
             supp_path = os.path.join(base_dir,"Supplements",f"{base_name}_supp{ext}")
             if os.path.exists(supp_path):
                 try:
-                    with open(supp_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        supp_content = f.read()
+                    supp_content = load_document(supp_path)
                     print(f"Found supplement file: {supp_path}")
                     break
-                except:
+                except Exception as e:
+                    print(f"Could not read {supp_path}: {e}")
                     continue
         
         # Try different extensions for protocol file  
@@ -51,22 +79,25 @@ class DualExtractionAPI:
             protocol_path = os.path.join(base_dir,"Protocols",f"{base_name}_protocol{ext}")
             if os.path.exists(protocol_path):
                 try:
-                    with open(protocol_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        protocol_content = f.read()
+                    protocol_content = load_document(protocol_path)
                     print(f"Found protocol file: {protocol_path}")
                     break
-                except:
+                except Exception as e:
+                    print(f"Could not read {protocol_path}: {e}")
                     continue
                     
         return supp_content, protocol_content
 
-    def extract_amstar_assessment(self, article_text, qc_questions, supp_content="", protocol_content=""):
+    def extract_amstar_assessment(self, article_text, qc_questions, supp_content="", protocol_content="", preassessed=None):
         """
         First API call: Extract AMSTAR 2 quality assessments with supplement/protocol info
-        """
         
-        # Filter for AMSTAR-related questions
-        amstar_questions = [q for q in qc_questions if self.is_amstar_question(q['Field'])]
+        Items are split by model tier (see model_routing.py); fast-tier items that fail
+        validation or flag uncertainty are re-assessed on the escalation tier. Items in
+        preassessed ({"Item_16": "Yes. ..."}, e.g. from amstar_batch.py) are not asked again; if
+        that leaves at most fold_max_items default-routed cheap-tier items, they join the
+        escalation-tier call rather than costing a request of their own.
+        """
         
         # Combine all available text
         combined_text = f"MAIN ARTICLE:\n{article_text}"
@@ -75,6 +106,77 @@ class DualExtractionAPI:
         if protocol_content:
             combined_text += f"\n\nPROTOCOL:\n{protocol_content}"
         
+        preassessed = preassessed or {}
+        amstar_results = [{'Section': 'AMSTAR_Items', 'Field': key, 'Value': value} for key, value in preassessed.items()]
+        item_keys = [f"Item_{i}" for i in range(1, 17) if f"Item_{i}" not in preassessed]
+        if not item_keys:
+            return amstar_results
+        by_tier = self.router.partition(item_keys)
+        escalation_tier = self.router.escalation_tier
+        cheap_keys = [key for tier, keys in by_tier.items() if tier != escalation_tier for key in keys]
+        if (preassessed and escalation_tier in by_tier and 0 < len(cheap_keys) <= self.fold_max_items
+                and not self.router.configured.intersection(cheap_keys)):
+            # Once the batch has taken most of the cheaper tiers' items, asking the few left by default
+            # routing in the escalation-tier call saves a whole per-article request
+            by_tier = {escalation_tier: item_keys}
+        by_tier = list(by_tier.items())
+        
+        def assess(tier_keys):
+            tier, keys = tier_keys
+            run = lambda subset, subset_tier: self._make_api_call(self.build_amstar_prompt(combined_text, subset), tier=subset_tier)
+            return self._routed_call(run, keys, tier, validate_amstar)
+        
+        # One call per tier and prompt caches are per model, so the tiers have nothing to share and run at once
+        for tier_results in self._run_per_tier(by_tier, assess):
+            amstar_results.extend(tier_results)
+        return amstar_results
+    
+    def _run_per_tier(self, jobs, func):
+        """
+        Run func over (tier, payload) jobs and return the results in job order.
+        
+        Prompt caches are per model, so within each tier the first job runs alone to write
+        that model's cache and the tier's other jobs then run in parallel reading it; the
+        tiers themselves proceed concurrently.
+        """
+        first_of_tier = {}
+        for i, (tier, _) in enumerate(jobs):
+            first_of_tier.setdefault(tier, i)
+        futures = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=self.max_parallel_calls) as executor:
+            for tier, i in first_of_tier.items():
+                futures[i] = executor.submit(func, jobs[i])
+            tier_of = {futures[i]: tier for tier, i in first_of_tier.items()}
+            for future in as_completed(list(tier_of)):
+                tier = tier_of[future]
+                for i, job in enumerate(jobs):
+                    if job[0] == tier and futures[i] is None:
+                        futures[i] = executor.submit(func, job)
+        return [future.result() for future in futures]
+    
+    def _routed_call(self, run, keys, tier, validate):
+        """Run keys on the tier's model via run(keys, tier), then escalate any keys whose answers fail validation"""
+        results = run(keys, tier)
+        valid, failed = validate(results, keys)
+        if failed and tier != self.router.escalation_tier:
+            print(f"Escalating {len(failed)} item(s) from {tier} to {self.router.escalation_tier}: {', '.join(failed)}")
+            self.router.record_escalation(tier, len(failed))
+            retried = run(failed, self.router.escalation_tier)
+            valid += [item for item in (retried if isinstance(retried, list) else [])
+                      if isinstance(item, dict) and item.get('Field') in failed]
+        elif failed:
+            # Keep whatever the escalation tier returned for these keys, as before routing existed
+            valid += [item for item in (results if isinstance(results, list) else [])
+                      if isinstance(item, dict) and item.get('Field') in failed]
+        return valid
+    
+    def build_amstar_prompt(self, combined_text, item_keys):
+        """AMSTAR prompt as content blocks: the combined documents first (cache breakpoint), then the instructions"""
+        if len(item_keys) == 16:
+            scope = "all 16 items"
+        else:
+            scope = f"ONLY these items: {', '.join(item_keys)}"
+        
         amstar_prompt = f"""
 You are conducting an AMSTAR 2 quality assessment of a systematic review/meta-analysis.
 
@@ -136,28 +238,76 @@ non-randomized study: methods used to ascertain exposures and outcomes, and sele
 - Search supplement/protocol text carefully for registration info, search strategies, excluded study lists, and bias assessment details
 - Cite which document (main/supplement/protocol) contains the evidence
 
+The COMBINED TEXT (Main Article + Supplements + Protocol) is provided above.
+ASSESS {scope}
 
-COMBINED TEXT (Main Article + Supplements + Protocol):
-{combined_text}
-
-Return ONLY the JSON array with assessments for all 16 items.
+Return ONLY the JSON array with assessments for {scope}.
 """
 
-        return self._make_api_call(amstar_prompt)
+        return [
+            {"type": "text", "text": f"COMBINED TEXT (Main Article + Supplements + Protocol):\n{combined_text}",
+             "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": amstar_prompt}
+        ]
     
-    def extract_study_data(self, article_text, qc_questions):
+    def extract_study_data(self, article_text, qc_questions, schema=None):
         """
         Second API call: Extract specific study data and results
-        """
         
-        # Filter for study data questions  
-        study_questions = [q for q in qc_questions if not self.is_amstar_question(q['Field'])]
-        
-        # Get the exact field names from QC sheet
-        study_fields = [q['Field'] for q in study_questions]
+        Fields are split into size-balanced groups (see study_field_groups.py) so no single
+        response runs into max_tokens. Within each model tier the first group runs alone to
+        write that model's prompt cache for the article; the tier's other groups then run in
+        parallel and read the cached article prefix.
+        """
         
+        # Get the exact study data field names from the compiled QC sheet
+        if schema is None:
+            schema = QCSchema(qc_questions)
+        study_fields = schema.study_fields
+        if not study_fields:
+            return []
+        
+        # Size-balanced groups within each model tier (tier chosen per field or QC section)
+        sections = {q['Field']: q.get('Section') for q in schema.study_questions}
+        groups = [(tier, group)
+                  for tier, fields in self.router.partition(study_fields, sections).items()
+                  for group in group_fields(fields, self.field_stats, self.study_group_chars)]
+        print(f"Extracting {len(study_fields)} study fields in {len(groups)} group(s)...")
+        
+        def extract(tier_group):
+            tier, group = tier_group
+            run = lambda subset, subset_tier: self._extract_field_group(article_text, subset, subset_tier)
+            return self._routed_call(run, group, tier, validate_study)
+        
+        study_results = []
+        for group_results in self._run_per_tier(groups, extract):
+            study_results.extend(group_results)
+        
+        # Feed observed output sizes back into the grouping for later articles
+        self.field_stats.update(study_results)
+        try:
+            self.field_stats.save()
+        except OSError as e:
+            # Only the group-size estimates are lost; the extraction itself succeeded
+            print(f"Could not save field stats: {e}")
+        return study_results
+    
+    def _extract_field_group(self, article_text, study_fields, tier=None):
+        """Extract one group of study fields; if the reply is unusable (e.g. truncated), split the group and retry"""
+        results = self._make_api_call(self.build_study_prompt(article_text, study_fields), tier=tier)
+        if isinstance(results, list) and results:
+            return results
+        if len(study_fields) > 1:
+            half = len(study_fields) // 2
+            print(f"Study extraction failed for {len(study_fields)} fields; retrying as two smaller groups...")
+            return (self._extract_field_group(article_text, study_fields[:half], tier) +
+                    self._extract_field_group(article_text, study_fields[half:], tier))
+        return []
+    
+    def build_study_prompt(self, article_text, study_fields):
+        """Study data prompt as content blocks: the article first (cache breakpoint), then the field instructions"""
         study_prompt = f"""
-Extract specific data from this research study and format as JSON array.
+Extract specific data from the research study above and format as JSON array.
 Each object must have exactly these keys: "Section", "Field", and "Value".
 
 CRITICAL: Use these EXACT field names in your response:
@@ -180,20 +330,20 @@ EXTRACTION GUIDELINES:
 - For missing data, write "Not reported" or "Not available"
 - For yes/no questions, write "Yes", "No", or "Unclear"
 
-
-ARTICLE TEXT:
-{article_text}
-
 Return ONLY a valid JSON array with one object for each field listed above.
 """
 
-        return self._make_api_call(study_prompt)
+        return [
+            {"type": "text", "text": f"ARTICLE TEXT:\n{article_text}", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": study_prompt}
+        ]
     
-    def _make_api_call(self, prompt, max_retries=3):
-        """Make API call to Claude with retry logic for rate limits"""
+    def _make_api_call(self, prompt, max_retries=3, tier=None, max_tokens=4000):
+        """Make API call to Claude with retry logic for rate limits (prompt is a string or a list of content blocks)"""
+        tier = tier or self.router.default_tier
         payload = {
-            "model": "claude-sonnet-4-20250514",
-            "max_tokens": 4000,
+            "model": self.router.model(tier),
+            "max_tokens": max_tokens,
             "messages": [
                 {
                     "role": "user", 
@@ -204,9 +354,14 @@ Return ONLY a valid JSON array with one object for each field listed above.
         
         for attempt in range(max_retries):
             try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                started = time.perf_counter()
                 response = requests.post(self.base_url, headers=self.headers, json=payload)
                 response.raise_for_status()
-                content = response.json()['content'][0]['text']
+                body = response.json()
+                self.router.record(tier, time.perf_counter() - started, body.get('usage'))
+                content = body['content'][0]['text']
                 
                 # Clean JSON response
                 if content.startswith('```json'):
@@ -227,8 +382,10 @@ Return ONLY a valid JSON array with one object for each field listed above.
                     return []
                 
             except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:  # Rate limit error
-                    wait_time = (attempt + 1) * 30  # Exponential backoff: 30, 60, 90 seconds
+                if e.response.status_code in (429, 529):  # Rate limit or overloaded error
+                    wait_time = (attempt + 1) * self.retry_wait  # Linear backoff: 30, 60, 90 seconds
+                    with self.lock:
+                        self.retry_count += 1
                     print(f"Rate limit exceeded. Waiting {wait_time} seconds before retry {attempt + 1}/{max_retries}...")
                     time.sleep(wait_time)
                     continue
@@ -247,108 +404,47 @@ Return ONLY a valid JSON array with one object for each field listed above.
     
     def is_amstar_question(self, field):
         """Determine if a question is AMSTAR-related"""
-        f = field.lower()
-        
-        # Check for explicit AMSTAR item patterns
-        for i in range(1, 17):
-            if f"item_{i}" in f or f"item {i}" in f:
-                return True
-        
-        # Check for AMSTAR-specific content
-        amstar_keywords = [
-            'pico components',
-            'protocol prior', 
-            'comprehensive search',
-            'selection duplicate',
-            'extraction duplicate', 
-            'excluded studies justify',
-            'adequate detail',
-            'risk of bias individual',
-            'funding sources',
-            'appropriate statistical',
-            'impact risk of bias',
-            'account risk of bias',
-            'heterogeneity explanation',
-            'publication bias investigation',
-            'conflict interest'
-        ]
-        
-        return any(keyword in f for keyword in amstar_keywords)
+        return is_amstar_field(field)
     
     def calculate_amstar_overall_rating(self, amstar_results):
         """Calculate AMSTAR 2 overall confidence rating based on critical domains"""
         
-        # Critical domains (items 2, 4, 7, 9, 11, 13, 15)
-        critical_domains = {
-            'Item_2': 2,   # Protocol registered before commencement
-            'Item_4': 4,   # Adequacy of literature search
-            'Item_7': 7,   # Justification for excluding studies
-            'Item_9': 9,   # Risk of bias from individual studies
-            'Item_11': 11, # Appropriateness of meta-analytical methods
-            'Item_13': 13, # Consideration of risk of bias when interpreting
-            'Item_15': 15  # Assessment of publication bias
-        }
-        
         # Create lookup for AMSTAR results
         amstar_lookup = {item['Field']: item['Value'] for item in amstar_results}
         
-        # Count critical flaws and non-critical weaknesses
-        critical_flaws = 0
-        non_critical_weaknesses = 0
-        
-        # Check critical domains - "No" or "Partial Yes" counts as flaw
-        for item_key, item_num in critical_domains.items():
-            value = amstar_lookup.get(item_key, "").lower()
-            if "No." in value or "Partial Yes." in value:
-                critical_flaws += 1
+        # Check critical domains (items 2, 4, 7, 9, 11, 13, 15) - "No" or "Partial Yes" counts as flaw
+        critical_flaws = sum(is_flaw(amstar_lookup.get(item_key, "")) for item_key in CRITICAL_DOMAINS)
         
         # Check non-critical domains (items 1, 3, 5, 6, 8, 10, 12, 14, 16)
-        non_critical_items = ['Item_1', 'Item_3', 'Item_5', 'Item_6', 'Item_8', 'Item_10', 'Item_12', 'Item_14', 'Item_16']
-        for item_key in non_critical_items:
-            value = amstar_lookup.get(item_key, "").lower()
-            if "No." or "Partial Yes." in value:
-                non_critical_weaknesses += 1
+        non_critical_weaknesses = sum(is_flaw(amstar_lookup.get(item_key, "")) for item_key in NON_CRITICAL_ITEMS)
         
         # Determine overall confidence rating based on your framework
-        if critical_flaws == 0:
-            if non_critical_weaknesses <= 1:
-                overall_rating = "HIGH"
-                confidence_description = "No or one non-critical weakness: the systematic review provides an accurate and comprehensive summary of the results of the available studies that address the question of interest"
-            else:
-                overall_rating = "MODERATE" 
-                confidence_description = "More than one non-critical weakness: the systematic review has more than one weakness but no critical flaws. It may provide an accurate summary of the results of the available studies that were included in the review"
-        elif critical_flaws == 1:
-            overall_rating = "LOW"
-            confidence_description = "One critical flaw with or without non-critical weaknesses: the review has a critical flaw and may not provide an accurate and comprehensive summary of the available studies that address the question of interest"
-        else:  # critical_flaws > 1
-            overall_rating = "CRITICALLY LOW"
-            confidence_description = "More than one critical flaw with or without non-critical weaknesses: the review has more than one critical flaw and should not be relied on to provide an accurate and comprehensive summary of the available studies"
+        rating = overall_rating(critical_flaws, non_critical_weaknesses)
         
         return {
-            'overall_rating': overall_rating,
-            'confidence_description': confidence_description,
+            'overall_rating': rating,
+            'confidence_description': RATING_DESCRIPTIONS[rating],
             'critical_flaws': critical_flaws,
             'non_critical_weaknesses': non_critical_weaknesses,
-            'critical_domains_assessed': list(critical_domains.values())
+            'critical_domains_assessed': list(CRITICAL_DOMAINS.values())
         }
 
-    def combine_extractions(self, amstar_results, study_results, qc_questions):
+    def combine_extractions(self, amstar_results, study_results, qc_questions, schema=None):
         """Combine AMSTAR and study data extractions"""
         # Create lookup dictionaries  
         amstar_lookup = {item['Field']: item['Value'] for item in amstar_results}
         study_lookup = {item['Field']: item['Value'] for item in study_results}
         
-        # Create AMSTAR item mapping (Item_1 = question 1, etc.)
-        amstar_questions = [q for q in qc_questions if q.get('Section') == 'AMSTAR2_Items']
+        # AMSTAR item mapping (Item_1 = question 1, etc.) is precomputed per QC row
+        if schema is None:
+            schema = QCSchema(qc_questions)
         
         combined_results = []
-        for question in qc_questions:
+        for question, item_key in zip(schema.questions, schema.item_keys):
             
             # Check if this is an AMSTAR question
-            if question.get('Section') == 'AMSTAR2_Items':
+            if item_key:
                 # Find corresponding Item_X in amstar_results
-                question_index = amstar_questions.index(question) + 1
-                item_key = f"Item_{question_index}"
                 value = amstar_lookup.get(item_key, f"AMSTAR assessment needed for: {question['Field']}")
                 extraction_type = "AMSTAR"
             else:
@@ -397,21 +493,23 @@ Return ONLY a valid JSON array with one object for each field listed above.
         
         return combined_results
     
-    def process_article_with_qc_sheet(self, article_text, qc_csv_path, article_path):
+    def process_article_with_qc_sheet(self, article_text, qc_csv_path, article_path, preassessed=None):
         """
         Complete workflow: Load QC sheet, load supplements/protocol, run dual extraction, combine results
+        
+        preassessed: AMSTAR items already answered for this article ({"Item_N": value}), which are skipped
         """
         
         # Load supplement and protocol files
         supp_content, protocol_content = self.load_supplement_files(article_path)
         
-        # Load QC questions
-        qc_df = pd.read_csv(qc_csv_path)
-        qc_questions = qc_df.to_dict('records')
+        # Load QC questions (compiled once and shared across articles)
+        schema = load_qc_schema(qc_csv_path)
+        qc_questions = schema.questions
         
         print(f"Loaded {len(qc_questions)} QC questions")
-        print(f"AMSTAR questions: {len([q for q in qc_questions if self.is_amstar_question(q['Field'])])}")
-        print(f"Study data questions: {len([q for q in qc_questions if not self.is_amstar_question(q['Field'])])}")
+        print(f"AMSTAR questions: {len(schema.amstar_questions)}")
+        print(f"Study data questions: {len(schema.study_questions)}")
         if supp_content:
             print("Including supplement file in AMSTAR assessment")
         if protocol_content:
@@ -419,26 +517,51 @@ Return ONLY a valid JSON array with one object for each field listed above.
         
         # First API call: AMSTAR assessment (with supplements/protocol)
         print("\nRunning AMSTAR assessment...")
-        amstar_results = self.extract_amstar_assessment(article_text, qc_questions, supp_content, protocol_content)
-        print("Waiting 60 seconds between API calls to avoid rate limits...")
-        time.sleep(60)  # Increased rate limiting
+        amstar_results = self.extract_amstar_assessment(article_text, qc_questions, supp_content, protocol_content,
+                                                        preassessed)
+        print(f"Waiting {self.between_calls_wait} seconds between API calls to avoid rate limits...")
+        time.sleep(self.between_calls_wait)  # Increased rate limiting
         
         # Second API call: Study data extraction  
         print("Running study data extraction...")
-        study_results = self.extract_study_data(article_text, qc_questions)
-        time.sleep(5)  # Rate limiting
+        study_results = self.extract_study_data(article_text, qc_questions, schema)
+        time.sleep(self.after_calls_wait)  # Rate limiting
         
         # Combine results
         print("Combining extractions...")
-        final_results = self.combine_extractions(amstar_results, study_results, qc_questions)
+        final_results = self.combine_extractions(amstar_results, study_results, qc_questions, schema)
         
         return final_results
-    
-    def save_results(self, results, output_file):
-        """Save combined results to CSV"""
-        df = pd.DataFrame(results)
-        df.to_csv(output_file, index=False)
-        print(f"Results saved to {output_file}")
+
+    def reassess_amstar(self, article_text, qc_csv_path, article_path, previous_results):
+        """
+        Re-run only the AMSTAR call (e.g. after a late supplement or protocol) and merge it
+        with the study data already extracted for this article
+        """
+        supp_content, protocol_content = self.load_supplement_files(article_path)
+        schema = load_qc_schema(qc_csv_path)
+
+        print("\nRe-running AMSTAR assessment with updated supplements/protocol...")
+        amstar_results = self.extract_amstar_assessment(article_text, schema.questions, supp_content, protocol_content)
+
+        study_results = [{'Field': r['Field'], 'Value': r['Value']} for r in previous_results
+                         if r.get('ExtractionType') == 'Study Data']
+        return self.combine_extractions(amstar_results, study_results, schema.questions, schema)
+
+    def save_results(self, results, output_file, article_id=None):
+        """Save combined results to CSV, or append them to a results database (.db/.sqlite)"""
+        # pandas and the results store are only needed here, so they stay out of the import path
+        import pandas as pd
+        from results_store import ResultsStore, is_results_db
+
+        if is_results_db(output_file):
+            with ResultsStore(output_file, journal_mode=self.results_journal_mode) as results_store:
+                results_store.append_article(article_id, results)
+            print(f"Results for {article_id} appended to {output_file}")
+        else:
+            df = pd.DataFrame(results)
+            df.to_csv(output_file, index=False)
+            print(f"Results saved to {output_file}")
         
         # Print summary
         amstar_count = len([r for r in results if r['ExtractionType'] == 'AMSTAR'])
@@ -451,12 +574,13 @@ Return ONLY a valid JSON array with one object for each field listed above.
 
 # USAGE EXAMPLE
 def main():
-    # Initialize the dual extraction API
-    extractor = DualExtractionAPI(my_key)
+    # Initialize the dual extraction API (with the article store if one was given)
+    store = ArticleStore(store_path) if store_path and ArticleStore.exists(store_path) else None
+    extractor = DualExtractionAPI(my_key, store=store)
     
     # Load your article text
-    with open(article, "r", encoding='utf-8') as f:
-        article_text = f.read()
+    article_id = os.path.splitext(os.path.basename(article))[0]
+    article_text = read_article(article, store)
     
     # Process with your QC sheet (now includes supplement/protocol checking)
     results = extractor.process_article_with_qc_sheet(
@@ -466,10 +590,21 @@ def main():
     )
     
     # Save results
-    extractor.save_results(results, file_name)
+    extractor.save_results(results, file_name, article_id=article_id)
+    print(extractor.router.report())
     
     return results
 
 if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] in ("-h", "--help"):
+        print("Usage: python data_extraction_AMSTAR.py ARTICLE.txt OUTPUT.csv|RESULTS.db [STORE_PREFIX]")
+        sys.exit(0 if len(sys.argv) > 1 else 1)
+
+    # Get article path and output file from command line
+    article=sys.argv[1]
+    file_name=sys.argv[2]
+    # Optional article store path prefix built with article_store.py
+    store_path=sys.argv[3] if len(sys.argv) > 3 else None
+
     # Single article processing
     results = main()
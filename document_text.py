@@ -0,0 +1,216 @@
+"""
+Text extraction for supplement and protocol files (.txt, .pdf, .docx).
+
+PDFs are read with pypdf and Word files with python-docx, then normalized
+(running headers/footers, page numbers, download/copyright stamps and broken
+hyphenation removed). Normalized text is cached on disk by a hash of the source
+bytes, and batches of files are converted in parallel across a process pool.
+"""
+
+import hashlib
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when extraction or normalization changes so cached text is regenerated
+NORMALIZER_VERSION = "2"
+DEFAULT_CACHE_DIR = os.environ.get("UMBRELLA_TEXT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "umbrella_review_text"))
+
+# Only dropped as the first or last line of a page; elsewhere a bare number is usually a table cell
+PAGE_NUMBER_PATTERN = re.compile(r'^\s*(page\s*)?\d+\s*(of\s*\d+)?\s*$', re.IGNORECASE)
+# Running headers/footers are only looked for among this many lines at the top and bottom of each page
+EDGE_LINES = 3
+BOILERPLATE_PATTERNS = [
+    re.compile(r'^\s*downloaded from\b', re.IGNORECASE),
+    re.compile(r'^\s*(©|\(c\)|copyright)\s', re.IGNORECASE),
+    re.compile(r'^\s*all rights reserved\.?\s*$', re.IGNORECASE),
+    re.compile(r'^\s*this article is protected by copyright', re.IGNORECASE),
+    re.compile(r'^\s*https?://(dx\.)?doi\.org/\S+\s*$', re.IGNORECASE),
+]
+
+
+def file_hash(path):
+    """SHA-256 of the file contents plus the normalizer version"""
+    digest = hashlib.sha256(NORMALIZER_VERSION.encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pdf_pages(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("pypdf is required to read PDF supplements: pip install pypdf")
+    reader = PdfReader(path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def _docx_pages(path):
+    try:
+        import docx
+    except ImportError:
+        raise ImportError("python-docx is required to read DOCX supplements: pip install python-docx")
+    document = docx.Document(path)
+    lines = [p.text for p in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            lines.append(" | ".join(cell.text.strip() for cell in row.cells))
+    # Word files have no reliable pages; treat the whole document as one
+    return ["\n".join(lines)]
+
+
+def _text_pages(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return [f.read()]
+
+
+def _edge_indices(lines):
+    """Indices of the first and last EDGE_LINES non-blank lines of a page"""
+    non_blank = [i for i, line in enumerate(lines) if line.strip()]
+    return set(non_blank[:EDGE_LINES] + non_blank[-EDGE_LINES:])
+
+
+def normalize_pages(pages):
+    """Join page texts, dropping running headers/footers and boilerplate lines"""
+    page_lines = [page.splitlines() for page in pages]
+    page_edges = [_edge_indices(lines) for lines in page_lines]
+
+    # A short line repeated at the top or bottom of at least half the pages is a running header/footer.
+    # Table cells ("Yes", "Low", "Unclear") repeat too, but also turn up in the body of a page, and
+    # number-only lines are left to the page-number check
+    repeated = set()
+    if len(page_lines) >= 3:
+        counts = Counter(line for lines, edges in zip(page_lines, page_edges)
+                         for line in {lines[i].strip() for i in edges})
+        body = {line.strip() for lines, edges in zip(page_lines, page_edges)
+                for i, line in enumerate(lines) if i not in edges}
+        repeated = {line for line, n in counts.items()
+                    if n >= len(page_lines) / 2 and len(line) < 120 and line not in body
+                    and re.search(r'[^\W\d_]', line)}
+
+    kept = []
+    for lines, edges in zip(page_lines, page_edges):
+        non_blank = [i for i, line in enumerate(lines) if line.strip()]
+        first_last = {non_blank[0], non_blank[-1]} if non_blank else set()
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if i in edges and stripped in repeated:
+                continue
+            if i in first_last and PAGE_NUMBER_PATTERN.search(stripped):
+                continue
+            if any(p.search(stripped) for p in BOILERPLATE_PATTERNS):
+                continue
+            kept.append(stripped)
+
+    text = "\n".join(kept)
+    text = re.sub(r'(\w)-\n(\w)', r'\1\2', text)       # re-join hyphenated line breaks
+    text = re.sub(r'[ \t ]+', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = text.replace('\x00', '')
+    return text.strip()
+
+
+def detect_kind(path):
+    """Classify a file as 'pdf', 'docx' or 'text' by extension, sniffing extensionless files"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.pdf', '.docx'):
+        return ext[1:]
+    if ext == '':
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+        if magic == b'%PDF':
+            return 'pdf'
+        if magic == b'PK\x03\x04':
+            return 'docx'
+    return 'text'
+
+
+def extract_text(path):
+    """Extract and normalize text from a .pdf or .docx file (no caching)"""
+    kind = detect_kind(path)
+    if kind == 'pdf':
+        pages = _pdf_pages(path)
+    elif kind == 'docx':
+        pages = _docx_pages(path)
+    else:
+        pages = _text_pages(path)
+    return normalize_pages(pages)
+
+
+def load_document(path, cache_dir=DEFAULT_CACHE_DIR):
+    """Return text for path; PDF/DOCX are extracted once and cached by file hash, plain text is read as-is"""
+    if detect_kind(path) == 'text':
+        return _text_pages(path)[0]
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{file_hash(path)}.txt")
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return f.read()
+
+    text = extract_text(path)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, cache_path)
+    return text
+
+
+def _load_one(args):
+    path, cache_dir = args
+    try:
+        return path, load_document(path, cache_dir), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def convert_files(paths, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    """Convert many files in parallel; returns {path: text} for the ones that succeeded"""
+    results = {}
+    if not paths:
+        return results
+    # Plain text is read inline; only PDF/DOCX conversion is worth a worker process
+    text_jobs = [(path, cache_dir) for path in paths if detect_kind(path) == 'text']
+    binary_jobs = [(path, cache_dir) for path in paths if detect_kind(path) != 'text']
+    outcomes = [_load_one(job) for job in text_jobs]
+    if workers == 1 or len(binary_jobs) <= 1:
+        outcomes.extend(_load_one(job) for job in binary_jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes.extend(executor.map(_load_one, binary_jobs))
+
+    for path, text, error in outcomes:
+        if error:
+            print(f"  ✗ Error converting {path}: {error}")
+        else:
+            results[path] = text
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Convert supplement/protocol PDFs and DOCX files to cached text")
+    parser.add_argument("input", help="Article directory containing Supplements/ and Protocols/ folders")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Text cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = []
+    for folder in ("Supplements", "Protocols"):
+        for ext in ("*.pdf", "*.docx"):
+            paths.extend(sorted(glob.glob(os.path.join(args.input, folder, ext))))
+
+    print(f"Converting {len(paths)} files...")
+    converted = convert_files(paths, args.cache_dir, args.workers)
+    for path, text in converted.items():
+        print(f"  ✓ {path} ({len(text):,} characters)")
+    print(f"Converted {len(converted)} out of {len(paths)} files; cache in {args.cache_dir}")
@@ -0,0 +1,213 @@
+"""
+Pluggable sentence-embedding backends for the topic-modeling scripts.
+
+'torch' is the fp32 SentenceTransformer baseline. 'onnx' runs the same model
+through ONNX Runtime on CPU and 'onnx-int8' uses a dynamically int8-quantized
+export of it, both with a configurable batch size and thread count. Encoded
+corpora are cached as float16 .npy files keyed by model, backend and text hash,
+and check_against_fp32 reports how far a backend's topic assignments move from
+the fp32 baseline.
+
+    python embedding_backend.py abstracts.csv --backend onnx-int8 --sample 2000 --threads 8
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+DEFAULT_CACHE_DIR = os.environ.get("UMBRELLA_EMBEDDING_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "umbrella_review_embeddings"))
+# Quantized ONNX exports are written here once per model and reused
+DEFAULT_EXPORT_DIR = os.path.join(DEFAULT_CACHE_DIR, "onnx_models")
+
+
+class EmbeddingBackend:
+    """A sentence-transformer model loaded on first use with the chosen CPU runtime"""
+
+    def __init__(self, model_name, backend='torch', batch_size=32, threads=None, quantization='avx2',
+                 export_dir=DEFAULT_EXPORT_DIR):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}; choose from {', '.join(BACKENDS)}")
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.threads = threads
+        self.quantization = quantization
+        self.export_dir = export_dir
+        self._model = None
+
+    @classmethod
+    def from_env(cls, model_name):
+        """Backend configured by UMBRELLA_EMBEDDING_BACKEND / _BATCH_SIZE / _THREADS, else fp32 torch"""
+        threads = os.environ.get("UMBRELLA_EMBEDDING_THREADS")
+        return cls(model_name,
+                   backend=os.environ.get("UMBRELLA_EMBEDDING_BACKEND", "torch"),
+                   batch_size=int(os.environ.get("UMBRELLA_EMBEDDING_BATCH_SIZE", 32)),
+                   threads=int(threads) if threads else None)
+
+    @property
+    def model(self):
+        """The SentenceTransformer (also usable as BERTopic's embedding_model, e.g. for KeyBERT)"""
+        if self._model is None:
+            self._model = self._load()
+        return self._model
+
+    def _onnx_kwargs(self):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        return {'provider': 'CPUExecutionProvider', 'session_options': options}
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == 'torch':
+            if self.threads:
+                import torch
+                torch.set_num_threads(self.threads)
+            return SentenceTransformer(self.model_name, device='cpu')
+
+        if self.backend == 'onnx':
+            return SentenceTransformer(self.model_name, backend='onnx', model_kwargs=self._onnx_kwargs())
+
+        # onnx-int8: export and quantize once into a local copy of the model, then load the quantized file
+        local_dir = os.path.join(self.export_dir, self.model_name.replace('/', '__'))
+        file_name = f"onnx/model_qint8_{self.quantization}.onnx"
+        if not os.path.exists(os.path.join(local_dir, file_name)):
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            print(f"Exporting int8 ONNX model for {self.model_name} to {local_dir}...")
+            onnx_model = SentenceTransformer(self.model_name, backend='onnx')
+            onnx_model.save(local_dir)
+            export_dynamic_quantized_onnx_model(onnx_model, self.quantization, local_dir)
+        kwargs = self._onnx_kwargs()
+        kwargs['file_name'] = file_name
+        return SentenceTransformer(local_dir, backend='onnx', model_kwargs=kwargs)
+
+    def encode(self, texts, show_progress_bar=False):
+        return self.model.encode(list(texts), batch_size=self.batch_size, show_progress_bar=show_progress_bar,
+                                 convert_to_numpy=True)
+
+
+class EmbeddingCache:
+    """Corpus embeddings stored as float16 .npy files (half the size of the fp32 arrays)"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def key(self, backend, texts):
+        digest = hashlib.sha256(f"{backend.model_name}\0{backend.backend}".encode('utf-8'))
+        for text in texts:
+            digest.update(b"\0")
+            digest.update(str(text).encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def load(self, key):
+        try:
+            return np.load(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def save(self, key, embeddings):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{self.path(key)}.{os.getpid()}.tmp.npy"
+        np.save(tmp, np.asarray(embeddings, dtype=np.float16))
+        os.replace(tmp, self.path(key))
+
+
+def encode_cached(backend, texts, cache=None, show_progress_bar=True):
+    """Encode texts with the backend, reusing the float16 cache; returns a float16 array"""
+    texts = list(texts)
+    cache = cache or EmbeddingCache()
+    key = cache.key(backend, texts)
+    embeddings = cache.load(key)
+    if embeddings is None:
+        embeddings = backend.encode(texts, show_progress_bar=show_progress_bar)
+        cache.save(key, embeddings)
+        embeddings = np.asarray(embeddings, dtype=np.float16)
+    else:
+        print(f"Loaded cached {backend.backend} embeddings for {backend.model_name}")
+    return embeddings
+
+
+def topic_agreement(reference, candidate, k=10, seed=42):
+    """
+    Reduce and cluster both embedding sets with the topic script's UMAP/KMeans settings
+    (fixed seeds) and compare the assignments
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+    from umap import UMAP
+
+    def assign(embeddings):
+        reduced = UMAP(n_neighbors=15, n_components=4, min_dist=0.0, metric='cosine',
+                       random_state=seed).fit_transform(np.asarray(embeddings, dtype=np.float32))
+        return KMeans(n_clusters=k, n_init=10, random_state=seed).fit_predict(reduced)
+
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    cosine = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1))
+    ref_labels, cand_labels = assign(reference), assign(candidate)
+    return {
+        'mean_cosine': float(np.mean(cosine)),
+        'min_cosine': float(np.min(cosine)),
+        'adjusted_rand': float(adjusted_rand_score(ref_labels, cand_labels)),
+        'nmi': float(normalized_mutual_info_score(ref_labels, cand_labels)),
+    }
+
+
+def check_against_fp32(texts, backend, k=10):
+    """Encode texts with fp32 torch and with backend; return timings and topic agreement"""
+    baseline = EmbeddingBackend(backend.model_name, 'torch', backend.batch_size, backend.threads)
+    timings = {}
+    outputs = {}
+    for name, candidate in (('fp32', baseline), (backend.backend, backend)):
+        candidate.model  # load outside the timed region
+        start = time.perf_counter()
+        outputs[name] = candidate.encode(texts)
+        timings[name] = time.perf_counter() - start
+
+    # Compare against what the cache would actually hand back
+    cached = np.asarray(outputs[backend.backend], dtype=np.float16)
+    result = topic_agreement(outputs['fp32'], cached, k=k)
+    result.update({
+        'fp32_encode_s': timings['fp32'],
+        f'{backend.backend}_encode_s': timings[backend.backend],
+        'speedup': timings['fp32'] / timings[backend.backend] if timings[backend.backend] else float('inf'),
+        'fp32_mb': outputs['fp32'].astype(np.float32).nbytes / 1e6,
+        'cached_mb': cached.nbytes / 1e6,
+    })
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Compare an embedding backend against the fp32 baseline")
+    parser.add_argument("abstracts", help="CSV with an Abstract column")
+    parser.add_argument("--model", default="pritamdeka/S-PubMedBert-MS-MARCO", help="Sentence-transformer model")
+    parser.add_argument("--backend", choices=BACKENDS, default="onnx-int8", help="Backend to check")
+    parser.add_argument("--batch-size", type=int, default=32, help="Encoding batch size")
+    parser.add_argument("--threads", type=int, help="CPU threads for the encoder")
+    parser.add_argument("--sample", type=int, default=2000, help="Abstracts to compare (0 = all)")
+    parser.add_argument("-k", type=int, default=10, help="Number of topics for the assignment check")
+    parser.add_argument("--min-ari", type=float, default=0.8, help="Exit non-zero below this adjusted Rand index")
+    args = parser.parse_args()
+
+    import pandas as pd
+    abstracts = pd.read_csv(args.abstracts)["Abstract"].dropna().astype(str)
+    if args.sample and args.sample < len(abstracts):
+        abstracts = abstracts.sample(args.sample, random_state=0)
+
+    result = check_against_fp32(abstracts.tolist(),
+                                EmbeddingBackend(args.model, args.backend, args.batch_size, args.threads), k=args.k)
+    for key, value in result.items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+    sys.exit(0 if result['adjusted_rand'] >= args.min_ari else 1)
@@ -0,0 +1,287 @@
+"""
+Local stub of the Anthropic Messages API for offline benchmarking.
+
+Serves POST /v1/messages on localhost with configurable latency, injected
+429/529 errors, rate-limit headers and truncated or fenced-JSON responses, so
+DualExtractionAPI and summarize_articles.py can be exercised without API spend.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec):
+    """Parse a latency spec such as 'fixed:0.05', 'uniform:0.02,0.2' or 'lognormal:-2.5,0.5'"""
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',') if v]
+
+    if kind == 'fixed':
+        return lambda rng: values[0] if values else 0.0
+    if kind == 'uniform':
+        low, high = values
+        return lambda rng: rng.uniform(low, high)
+    if kind == 'lognormal':
+        mu, sigma = values
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def prompt_text(payload):
+    """Flatten the system prompt and user messages of a request into one string"""
+    parts = []
+    system = payload.get('system', '')
+    if isinstance(system, str):
+        parts.append(system)
+    else:
+        parts.extend(block.get('text', '') for block in system)
+
+    for message in payload.get('messages', []):
+        content = message.get('content', '')
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get('text', '') for block in content if block.get('type') == 'text')
+    return "\n".join(parts)
+
+
+def cached_prefix(payload):
+    """Text of the prompt up to its last cache_control breakpoint ('' if it has none)"""
+    blocks = []
+    system = payload.get('system', '')
+    if not isinstance(system, str):
+        blocks.extend(system)
+    for message in payload.get('messages', []):
+        if not isinstance(message.get('content', ''), str):
+            blocks.extend(message['content'])
+    breakpoints = [i for i, block in enumerate(blocks) if block.get('cache_control')]
+    if not breakpoints:
+        return ""
+    return "\n".join(block.get('text', '') for block in blocks[:breakpoints[-1] + 1])
+
+
+class MockClaudeServer:
+    """Threaded HTTP stub that answers Messages API calls with synthetic extractions"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0.0", rate_429=0.0, rate_529=0.0,
+                 truncate_rate=0.0, fence_rate=0.0, requests_per_minute=50, seed=0):
+        self.latency = parse_latency(latency)
+        self.rate_429 = rate_429
+        self.rate_529 = rate_529
+        self.truncate_rate = truncate_rate
+        self.fence_rate = fence_rate
+        self.requests_per_minute = requests_per_minute
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'ok': 0,
+            'injected_429': 0,
+            'injected_529': 0,
+            'truncated': 0,
+            'fenced': 0,
+            'input_chars': 0,
+        }
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        # (model, cached prefix) pairs already written, to report cache reads like the real API
+        self.prompt_cache = set()
+
+        handler = self._make_handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def messages_url(self):
+        return f"{self.base_url}/v1/messages"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _draw(self):
+        """Draw latency and fault decisions for one request under the lock so runs are reproducible"""
+        with self.lock:
+            self.stats['requests'] += 1
+            delay = self.latency(self.rng)
+            roll = self.rng.random()
+            truncate = self.rng.random() < self.truncate_rate
+            fence = self.rng.random() < self.fence_rate
+
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            remaining = max(self.requests_per_minute - self.window_count, 0)
+            reset = max(60 - (now - self.window_start), 0)
+
+        if roll < self.rate_429:
+            status = 429
+        elif roll < self.rate_429 + self.rate_529:
+            status = 529
+        else:
+            status = 200
+        return delay, status, truncate, fence, remaining, reset
+
+    def usage(self, payload, prompt, text):
+        """Token usage for a reply, splitting the input into uncached, cache-write and cache-read tokens"""
+        prefix = cached_prefix(payload)
+        cached = len(prefix) // 4
+        usage = {"input_tokens": len(prompt) // 4 - cached, "output_tokens": len(text) // 4,
+                 "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        if prefix:
+            key = (payload.get("model"), hash(prefix))
+            with self.lock:
+                hit = key in self.prompt_cache
+                self.prompt_cache.add(key)
+            usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = cached
+        return usage
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def build_reply(self, prompt, truncate=False, fence=False):
+        """Build a plausible assistant reply for the prompt types used by the scripts"""
+        with self.lock:
+            choices = [self.rng.choice(["Yes", "No", "Partial Yes"]) for _ in range(16)]
+
+        if "AMSTAR 2 batch assessment" in prompt:
+            item = re.search(r'ITEM: (Item_\d+)', prompt).group(1)
+            articles = re.findall(r'=== ARTICLE ID: (.+?) ===', prompt)
+            with self.lock:
+                answers = [self.rng.choice(["Yes", "No"]) for _ in articles]
+            body = json.dumps([
+                {"Article": article, "Field": item, "Value": f"{answer}. Mock evidence for {item} from the excerpts."}
+                for article, answer in zip(articles, answers)
+            ], indent=2)
+        elif "AMSTAR 2 quality assessment" in prompt:
+            subset = re.search(r'ASSESS ONLY these items: ([\w, ]+)', prompt)
+            items = [int(key.split('_')[1]) for key in subset.group(1).split(', ')] if subset else range(1, 17)
+            body = json.dumps([
+                {
+                    "Section": "AMSTAR_Items",
+                    "Field": f"Item_{i}",
+                    "Value": f"{choices[i - 1]}. Mock evidence for item {i} drawn from the main article."
+                }
+                for i in items
+            ], indent=2)
+        else:
+            match = re.search(r'EXACT field names in your response:\s*(\[.*?\])\s*\n\s*For each field', prompt, re.DOTALL)
+            if match:
+                fields = json.loads(match.group(1))
+                body = json.dumps([
+                    {"Section": "Study_Data", "Field": field, "Value": f"Mock value for {field}"}
+                    for field in fields
+                ], indent=2)
+            else:
+                body = "**Cluster Label**: Mock cluster\n\n" + "Mock synthesis of the supplied articles. " * 40
+
+        if fence:
+            body = f"```json\n{body}\n```"
+        if truncate:
+            body = body[:len(body) // 2]
+        return body
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, extra_headers, reset):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("anthropic-ratelimit-requests-limit", str(server.requests_per_minute))
+                self.send_header("anthropic-ratelimit-requests-reset", f"{reset:.0f}")
+                for key, value in extra_headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                delay, status, truncate, fence, remaining, reset = server._draw()
+                time.sleep(delay)
+
+                headers = {"anthropic-ratelimit-requests-remaining": str(remaining)}
+                if status == 429:
+                    server._count('injected_429')
+                    headers["retry-after"] = "1"
+                    self._send(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "Mock rate limit"}}, headers, reset)
+                    return
+                if status == 529:
+                    server._count('injected_529')
+                    self._send(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Mock overload"}}, headers, reset)
+                    return
+
+                prompt = prompt_text(payload)
+                text = server.build_reply(prompt, truncate=truncate, fence=fence)
+                server._count('ok')
+                server._count('input_chars', len(prompt))
+                if truncate:
+                    server._count('truncated')
+                if fence:
+                    server._count('fenced')
+
+                self._send(200, {
+                    "id": f"msg_mock_{server.stats['requests']}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": payload.get("model", "mock"),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "max_tokens" if truncate else "end_turn",
+                    "stop_sequence": None,
+                    "usage": server.usage(payload, prompt, text),
+                }, headers, reset)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local mock of the Claude Messages API")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency", default="fixed:0.05", help="Latency distribution, e.g. uniform:0.02,0.2")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-529", type=float, default=0.0, help="Fraction of requests answered with 529")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of replies cut off mid-JSON")
+    parser.add_argument("--fence-rate", type=float, default=0.0, help="Fraction of replies wrapped in ```json fences")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    server = MockClaudeServer(port=args.port, latency=args.latency, rate_429=args.rate_429, rate_529=args.rate_529,
+                              truncate_rate=args.truncate_rate, fence_rate=args.fence_rate, seed=args.seed)
+    print(f"Mock Claude API listening on {server.messages_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
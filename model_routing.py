@@ -0,0 +1,181 @@
+"""
+Cost/latency-tiered model routing for the extraction and summary scripts.
+
+Each task (an AMSTAR item, a QC section or field, or a summary call) is mapped
+to a tier. Fast-tier answers that fail validation or flag uncertainty are
+escalated, key by key, to the large tier. Calls, latency, tokens and estimated
+cost are tallied per tier so the savings can be reported.
+"""
+
+import json
+import os
+import threading
+
+# Prices are USD per million tokens; prompt-cache writes and reads are billed at these multiples of the
+# input price unless a tier sets cache_write_cost / cache_read_cost
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+TOKEN_COUNTS = ('input_tokens', 'cache_write_tokens', 'cache_read_tokens', 'output_tokens')
+DEFAULT_TIERS = {
+    'fast': {'model': 'claude-3-5-haiku-20241022', 'input_cost': 0.80, 'output_cost': 4.00},
+    'large': {'model': 'claude-sonnet-4-20250514', 'input_cost': 3.00, 'output_cost': 15.00},
+}
+
+# Yes/No-only, non-critical AMSTAR items and short lookup fields go to the fast tier;
+# critical domains (2, 4, 7, 9, 11, 13, 15) and Partial Yes items stay on the large model
+DEFAULT_ROUTES = {
+    'Item_1': 'fast',
+    'Item_3': 'fast',
+    'Item_5': 'fast',
+    'Item_6': 'fast',
+    'Item_10': 'fast',
+    'Item_12': 'fast',
+    'Item_14': 'fast',
+    'Item_16': 'fast',
+}
+DEFAULT_FIELD_PATTERNS = {
+    'country': 'fast',
+}
+
+AMSTAR_ANSWERS = ('Yes', 'No', 'Partial Yes', 'Not applicable')
+PARTIAL_YES_ITEMS = {'Item_2', 'Item_4', 'Item_7', 'Item_8', 'Item_9'}
+UNCERTAINTY_MARKERS = ('uncertain', 'not sure', 'cannot determine', 'cannot be determined',
+                       'unable to determine', 'difficult to determine')
+
+
+def flags_uncertainty(value):
+    v = str(value).lower()
+    return any(marker in v for marker in UNCERTAINTY_MARKERS)
+
+
+def validate_amstar(results, item_keys):
+    """Split AMSTAR results into valid entries and the requested item keys that need escalation"""
+    valid = {}
+    for item in results if isinstance(results, list) else []:
+        if not isinstance(item, dict):
+            continue
+        key, value = item.get('Field'), str(item.get('Value', ''))
+        if key not in item_keys or not value.startswith(AMSTAR_ANSWERS) or flags_uncertainty(value):
+            continue
+        if value.startswith('Partial Yes') and key not in PARTIAL_YES_ITEMS:
+            continue
+        valid[key] = item
+    return [valid[key] for key in item_keys if key in valid], [key for key in item_keys if key not in valid]
+
+
+def validate_study(results, fields):
+    """Split study-data results into valid entries and the requested fields that need escalation"""
+    valid = {}
+    for item in results if isinstance(results, list) else []:
+        if not isinstance(item, dict):
+            continue
+        field, value = item.get('Field'), item.get('Value')
+        if field not in fields or value in (None, '') or flags_uncertainty(value):
+            continue
+        valid[field] = item
+    return [valid[field] for field in fields if field in valid], [field for field in fields if field not in valid]
+
+
+class ModelRouter:
+    """Maps tasks to model tiers and keeps per-tier call statistics"""
+
+    def __init__(self, tiers=None, routes=None, field_patterns=None, default_tier='large', escalation_tier='large',
+                 configured=None):
+        self.tiers = tiers or dict(DEFAULT_TIERS)
+        self.routes = DEFAULT_ROUTES.copy() if routes is None else routes
+        # Keys whose route was set explicitly (not a default); callers must not move these to another tier
+        self.configured = set(configured if configured is not None else (routes or ()))
+        self.field_patterns = DEFAULT_FIELD_PATTERNS.copy() if field_patterns is None else field_patterns
+        self.default_tier = default_tier
+        self.escalation_tier = escalation_tier
+        self.lock = threading.Lock()
+        self.stats = {tier: self._empty_stats() for tier in self.tiers}
+
+    @staticmethod
+    def _empty_stats():
+        return dict({'calls': 0, 'escalated_keys': 0, 'latency_s': 0.0}, **{count: 0 for count in TOKEN_COUNTS})
+
+    @classmethod
+    def from_json(cls, path):
+        """Load a config like {"tiers": {...}, "routes": {"Item_9": "fast"}, "field_patterns": {...}, "default_tier": "large"}"""
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        tiers = dict(DEFAULT_TIERS)
+        tiers.update(config.get('tiers', {}))
+        routes = DEFAULT_ROUTES.copy()
+        routes.update(config.get('routes', {}))
+        patterns = DEFAULT_FIELD_PATTERNS.copy()
+        patterns.update(config.get('field_patterns', {}))
+        return cls(tiers, routes, patterns, config.get('default_tier', 'large'), config.get('escalation_tier', 'large'),
+                   configured=config.get('routes', {}))
+
+    @classmethod
+    def from_env(cls):
+        """Router from the JSON file named by UMBRELLA_MODEL_ROUTES, else the defaults"""
+        path = os.environ.get('UMBRELLA_MODEL_ROUTES')
+        return cls.from_json(path) if path else cls()
+
+    def tier_for(self, key, section=None):
+        """Tier for an AMSTAR item, QC field or task name (exact key, then section, then field pattern)"""
+        if key in self.routes:
+            return self.routes[key]
+        if section and section in self.routes:
+            return self.routes[section]
+        lowered = key.lower()
+        for pattern, tier in self.field_patterns.items():
+            if pattern in lowered:
+                return tier
+        return self.default_tier
+
+    def model(self, tier):
+        return self.tiers[tier]['model']
+
+    def partition(self, keys, sections=None):
+        """Group keys by tier, keeping their order: {tier: [keys]}"""
+        sections = sections or {}
+        groups = {}
+        for key in keys:
+            groups.setdefault(self.tier_for(key, sections.get(key)), []).append(key)
+        return groups
+
+    def record(self, tier, latency, usage=None):
+        usage = usage or {}
+        with self.lock:
+            entry = self.stats.setdefault(tier, self._empty_stats())
+            entry['calls'] += 1
+            entry['latency_s'] += latency
+            # input_tokens in the API usage excludes the cached prefix, which is reported (and billed) separately
+            entry['input_tokens'] += usage.get('input_tokens') or 0
+            entry['cache_write_tokens'] += usage.get('cache_creation_input_tokens') or 0
+            entry['cache_read_tokens'] += usage.get('cache_read_input_tokens') or 0
+            entry['output_tokens'] += usage.get('output_tokens') or 0
+
+    def record_escalation(self, tier, n_keys):
+        with self.lock:
+            self.stats[tier]['escalated_keys'] += n_keys
+
+    def cost(self, tier):
+        entry, prices = self.stats[tier], self.tiers[tier]
+        cache_write_cost = prices.get('cache_write_cost', prices['input_cost'] * CACHE_WRITE_MULTIPLIER)
+        cache_read_cost = prices.get('cache_read_cost', prices['input_cost'] * CACHE_READ_MULTIPLIER)
+        return (entry['input_tokens'] * prices['input_cost']
+                + entry['cache_write_tokens'] * cache_write_cost
+                + entry['cache_read_tokens'] * cache_read_cost
+                + entry['output_tokens'] * prices['output_cost']) / 1e6
+
+    def report(self):
+        """Per-tier calls, latency, tokens and estimated cost as printable lines"""
+        lines = ["MODEL ROUTING SUMMARY:"]
+        total = 0.0
+        for tier, entry in self.stats.items():
+            if not entry['calls']:
+                continue
+            cost = self.cost(tier)
+            total += cost
+            mean_latency = entry['latency_s'] / entry['calls']
+            lines.append(f"  {tier} ({self.model(tier)}): {entry['calls']} calls, {mean_latency:.1f} s mean latency, "
+                         f"{entry['input_tokens']:,} in + {entry['cache_write_tokens']:,} cache write + "
+                         f"{entry['cache_read_tokens']:,} cache read / {entry['output_tokens']:,} out tokens, "
+                         f"${cost:.4f}, {entry['escalated_keys']} keys escalated")
+        lines.append(f"  Estimated total cost: ${total:.4f}")
+        return "\n".join(lines)
@@ -0,0 +1,83 @@
+"""
+Precompiled view of the data-extraction QC sheet.
+
+The QC sheet is classified once into AMSTAR and study-data fields, with each
+AMSTAR2_Items row mapped to its Item_N key by position, and the result is
+shared by every article in a run instead of being recomputed per field.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+
+AMSTAR_SECTION = 'AMSTAR2_Items'
+
+# Equivalent to checking "item_1" .. "item_16" / "item 1" .. "item 16" as substrings
+ITEM_PATTERN = re.compile(r'item[_ ][1-9]')
+
+AMSTAR_KEYWORDS = [
+    'pico components',
+    'protocol prior',
+    'comprehensive search',
+    'selection duplicate',
+    'extraction duplicate',
+    'excluded studies justify',
+    'adequate detail',
+    'risk of bias individual',
+    'funding sources',
+    'appropriate statistical',
+    'impact risk of bias',
+    'account risk of bias',
+    'heterogeneity explanation',
+    'publication bias investigation',
+    'conflict interest'
+]
+KEYWORD_PATTERN = re.compile('|'.join(re.escape(k) for k in AMSTAR_KEYWORDS))
+
+
+@lru_cache(maxsize=None)
+def is_amstar_field(field):
+    """Determine if a QC field is AMSTAR-related"""
+    f = field.lower()
+    return bool(ITEM_PATTERN.search(f) or KEYWORD_PATTERN.search(f))
+
+
+class QCSchema:
+    """QC questions split into AMSTAR and study-data fields, with the AMSTAR row -> Item_N mapping"""
+
+    def __init__(self, qc_questions):
+        self.questions = list(qc_questions)
+        self.amstar_questions = [q for q in self.questions if is_amstar_field(q['Field'])]
+        self.study_questions = [q for q in self.questions if not is_amstar_field(q['Field'])]
+        self.study_fields = [q['Field'] for q in self.study_questions]
+
+        # Item_N keys by row position among AMSTAR2_Items rows, so duplicate rows keep their own item
+        self.item_keys = []
+        item_number = 0
+        for question in self.questions:
+            if question.get('Section') == AMSTAR_SECTION:
+                item_number += 1
+                self.item_keys.append(f"Item_{item_number}")
+            else:
+                self.item_keys.append(None)
+
+        self.expected_keys = [key for key in self.item_keys if key] + self.study_fields
+
+    @classmethod
+    def from_csv(cls, qc_csv_path):
+        import pandas as pd
+        return cls(pd.read_csv(qc_csv_path).to_dict('records'))
+
+    def __len__(self):
+        return len(self.questions)
+
+
+def load_qc_schema(qc_csv_path):
+    """Load and compile a QC sheet once per process (recompiled if the file changes)"""
+    return _load_qc_schema(qc_csv_path, os.stat(qc_csv_path).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _load_qc_schema(qc_csv_path, mtime_ns):
+    return QCSchema.from_csv(qc_csv_path)
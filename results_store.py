@@ -0,0 +1,186 @@
+"""
+Append-only SQLite store for extraction results.
+
+Replaces one CSV per article with a single indexed database keyed by
+(article, field), using the same columns save_results writes today. Each
+article is committed in one transaction, so a crash never leaves
+a half-written article, and corpus-level questions ("all Item_9 ratings",
+"all CRITICALLY LOW reviews") become single indexed queries.
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from amstar_rating import RATING_DESCRIPTIONS, rate_items
+
+AMSTAR_SECTION = 'AMSTAR2_Items'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    Article TEXT NOT NULL,
+    Section TEXT,
+    Field TEXT NOT NULL,
+    Value TEXT,
+    ExtractionType TEXT,
+    ProcessedAt TEXT,
+    Item TEXT,
+    PRIMARY KEY (Article, Field)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_extractions_field ON extractions (Field, Article);
+CREATE INDEX IF NOT EXISTS idx_extractions_item ON extractions (Item, Article) WHERE Item IS NOT NULL;
+"""
+
+JOURNAL_MODES = ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST')
+
+COLUMNS = ['Section', 'Field', 'Value', 'ExtractionType', 'ProcessedAt']
+
+
+def is_results_db(path):
+    return str(path).endswith(('.db', '.sqlite', '.sqlite3'))
+
+
+class ResultsStore:
+    """Extraction results for a whole corpus in one SQLite file"""
+
+    def __init__(self, db_path, timeout=60, journal_mode=None):
+        """
+        journal_mode: SQLite journal mode to switch the file to. By default a new database uses WAL and an
+        existing one keeps its mode; writers on several hosts over a network filesystem need 'DELETE',
+        since WAL relies on shared memory those filesystems do not provide.
+        """
+        self.db_path = db_path
+        is_new = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path, timeout=timeout)
+        journal_mode = journal_mode or ('WAL' if is_new else None)
+        if journal_mode:
+            if journal_mode.upper() not in JOURNAL_MODES:
+                raise ValueError(f"Unknown journal mode {journal_mode!r}; expected one of {', '.join(JOURNAL_MODES)}")
+            self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        if self.conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal':
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append_article(self, article_id, results):
+        """Write one article's rows atomically, replacing any earlier rows for the same (article, field)"""
+        rows = []
+        item_number = 0
+        for r in results:
+            item = None
+            # Same positional Item_N numbering as QCSchema.item_keys
+            if r.get('Section') == AMSTAR_SECTION:
+                item_number += 1
+                item = f"Item_{item_number}"
+            rows.append((article_id, r.get('Section'), r['Field'], str(r.get('Value', '')),
+                         r.get('ExtractionType'), r.get('ProcessedAt'), item))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO extractions (Article, Section, Field, Value, ExtractionType, ProcessedAt, Item) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def import_csv(self, csv_path, article_id=None):
+        """Load a per-article CSV written by the old save_results"""
+        article_id = article_id or os.path.splitext(os.path.basename(csv_path))[0]
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        return self.append_article(article_id, df.to_dict('records'))
+
+    def update_items(self, article_id, items, processed_at=None):
+        """Overwrite stored AMSTAR values by item key ({"Item_16": "Yes. ..."}); returns rows changed"""
+        with self.conn:
+            cur = self.conn.executemany(
+                "UPDATE extractions SET Value = ?, ProcessedAt = COALESCE(?, ProcessedAt) WHERE Article = ? AND Item = ?",
+                [(str(value), processed_at, article_id, item) for item, value in items.items()])
+        return cur.rowcount
+
+    def articles(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT Article FROM extractions ORDER BY Article")]
+
+    def article(self, article_id):
+        """All rows for one article as a DataFrame with the save_results columns"""
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM extractions WHERE Article = ?",
+                                 self.conn, params=(article_id,))
+
+    def field(self, field_or_item):
+        """Every article's value for a QC field name or an AMSTAR item key such as 'Item_9'"""
+        return pd.read_sql_query(
+            "SELECT Article, Field, Value FROM extractions WHERE Item = ? OR Field = ? ORDER BY Article",
+            self.conn, params=(field_or_item, field_or_item))
+
+    def articles_rated(self, rating):
+        """Articles whose stored overall confidence rating is e.g. 'CRITICALLY LOW'"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT Article FROM extractions WHERE Field = 'Overall_Confidence_Rating' AND Value LIKE ? ORDER BY Article",
+            (f"{rating} - %",))]
+
+    def item_matrix(self):
+        """Articles x Item_1..Item_16 matrix of AMSTAR values"""
+        long = pd.read_sql_query("SELECT Article, Item, Value FROM extractions WHERE Item IS NOT NULL", self.conn)
+        return long.pivot(index='Article', columns='Item', values='Value')
+
+    def recompute_ratings(self, write=False):
+        """Recompute calculate_amstar_overall_rating for every article in one vectorized pass"""
+        ratings = rate_items(self.item_matrix())
+        if write and len(ratings):
+            self.write_ratings(ratings)
+        return ratings
+
+    def write_ratings(self, ratings):
+        rows = []
+        for article_id, r in ratings.iterrows():
+            rows += [
+                (article_id, 'AMSTAR2_Overall', 'Overall_Confidence_Rating',
+                 f"{r['overall_rating']} - {RATING_DESCRIPTIONS[r['overall_rating']]}", 'AMSTAR', None, None),
+                (article_id, 'AMSTAR2_Overall', 'Critical_Flaws_Count', str(r['critical_flaws']), 'AMSTAR', None, None),
+                (article_id, 'AMSTAR2_Overall', 'Non_Critical_Weaknesses_Count', str(r['non_critical_weaknesses']), 'AMSTAR', None, None),
+            ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO extractions (Article, Section, Field, Value, ExtractionType, ProcessedAt, Item) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def export_csv(self, output_file):
+        """Whole corpus as one long CSV (Article plus the save_results columns)"""
+        df = pd.read_sql_query(f"SELECT Article, {', '.join(COLUMNS)} FROM extractions ORDER BY Article", self.conn)
+        df.to_csv(output_file, index=False)
+        return len(df)
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Query or maintain the extraction results database")
+    parser.add_argument("db", help="Results database (.db / .sqlite)")
+    parser.add_argument("--import-csv", nargs="+", metavar="CSV", help="Import per-article CSVs (article id = file stem)")
+    parser.add_argument("--field", help="Show every article's value for a field or AMSTAR item (e.g. Item_9)")
+    parser.add_argument("--rating", help="List articles with this overall rating (e.g. 'CRITICALLY LOW')")
+    parser.add_argument("--recompute", action="store_true", help="Recompute overall AMSTAR ratings for the corpus and store them")
+    parser.add_argument("--export", help="Export the whole corpus to one CSV")
+    args = parser.parse_args()
+
+    with ResultsStore(args.db) as store:
+        if args.import_csv:
+            paths = [p for pattern in args.import_csv for p in sorted(glob.glob(pattern))]
+            for path in paths:
+                print(f"  ✓ {path}: {store.import_csv(path)} rows")
+        if args.recompute:
+            ratings = store.recompute_ratings(write=True)
+            print(ratings['overall_rating'].value_counts().to_string())
+        if args.field:
+            print(store.field(args.field).to_string(index=False))
+        if args.rating:
+            for article_id in store.articles_rated(args.rating):
+                print(article_id)
+        if args.export:
+            print(f"Exported {store.export_csv(args.export)} rows to {args.export}")
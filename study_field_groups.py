@@ -0,0 +1,92 @@
+"""
+Size-aware grouping of study-data fields for sharded extraction calls.
+
+Output lengths per QC field are tracked across runs in a small JSON file; fields
+are packed into groups whose expected JSON output stays well under max_tokens,
+so verbose fields (effect sizes, CIs, per-analysis study counts) no longer
+truncate the whole study extraction.
+"""
+
+import json
+import os
+import threading
+
+DEFAULT_STATS_PATH = os.environ.get("UMBRELLA_FIELD_STATS", os.path.join(os.path.expanduser("~"), ".cache", "umbrella_review", "field_output_stats.json"))
+
+# Rough output size (characters) for fields never seen before
+VERBOSE_HINTS = ('finding', 'effect', 'confidence', 'interval', 'result', 'outcome',
+                 'number of studies', 'meta-analys', 'moderat', 'subgroup', 'population')
+VERBOSE_DEFAULT_CHARS = 1500
+SHORT_DEFAULT_CHARS = 250
+# JSON keys, quoting and Section/Field echo per object
+PER_FIELD_OVERHEAD_CHARS = 80
+
+
+def default_estimate(field):
+    f = field.lower()
+    return VERBOSE_DEFAULT_CHARS if any(hint in f for hint in VERBOSE_HINTS) else SHORT_DEFAULT_CHARS
+
+
+class FieldStats:
+    """Running max and mean output length per field, persisted between runs"""
+
+    def __init__(self, path=DEFAULT_STATS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.stats = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Could not read field stats {path}: {e}")
+
+    def estimate(self, field):
+        """Expected output characters for a field: between the mean and max seen, else a heuristic"""
+        entry = self.stats.get(field)
+        if not entry:
+            return default_estimate(field)
+        mean = entry['total'] / entry['count']
+        return int((mean + entry['max']) / 2) + PER_FIELD_OVERHEAD_CHARS
+
+    def update(self, results):
+        """Record the Value lengths from a list of extraction result dicts"""
+        with self.lock:
+            for item in results:
+                field = item.get('Field')
+                if not field:
+                    continue
+                length = len(str(item.get('Value', '')))
+                entry = self.stats.setdefault(field, {'count': 0, 'total': 0, 'max': 0})
+                entry['count'] += 1
+                entry['total'] += length
+                entry['max'] = max(entry['max'], length)
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Per-process name: queue workers sharing a directory save concurrently
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def group_fields(fields, stats, budget_chars):
+    """Pack fields into groups whose estimated output fits budget_chars (first-fit decreasing, order kept within groups)"""
+    sized = sorted(((stats.estimate(f), i, f) for i, f in enumerate(fields)), reverse=True)
+    groups = []
+    for size, i, field in sized:
+        for group in groups:
+            if group['chars'] + size <= budget_chars:
+                group['fields'].append((i, field))
+                group['chars'] += size
+                break
+        else:
+            groups.append({'chars': size, 'fields': [(i, field)]})
+
+    # Keep the QC sheet order inside each group and order groups by their first field
+    ordered = sorted(sorted(group['fields']) for group in groups)
+    return [[field for _, field in group] for group in ordered]
@@ -1,11 +1,42 @@
-import anthropic
 import os
 import glob
 import argparse
+import time
 from pathlib import Path
 
-# Initialize the client
-client = anthropic.Anthropic(api_key=$ANTHROPIC_KEY)
+from article_store import ArticleStore, read_article
+from model_routing import ModelRouter
+
+# Built on first use so --help and the usage message do not import or construct it
+client = None
+
+# Model tier per summary task (cluster_summary, batch_summary, synthesis); all default to the large model
+router = ModelRouter.from_env()
+
+
+def get_client():
+    global client
+    if client is None:
+        import anthropic
+        client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_KEY", ""))
+    return client
+
+
+def create_message(task, prompt):
+    """Send one summary prompt on the model routed for this task and record its latency/usage"""
+    tier = router.tier_for(task)
+    started = time.perf_counter()
+    response = get_client().messages.create(
+        model=router.model(tier),
+        max_tokens=8000,
+        temperature=0.3,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    usage = getattr(response, 'usage', None)
+    router.record(tier, time.perf_counter() - started,
+                  {'input_tokens': getattr(usage, 'input_tokens', 0) or 0,
+                   'output_tokens': getattr(usage, 'output_tokens', 0) or 0})
+    return response.content[0].text
 
 
 def debug_directory_contents(directory_path):
@@ -57,8 +88,8 @@ def find_article_files(input_path, file_pattern="*.txt"):
             print(f"DEBUG:   - {f}")
         return files
 
-def read_and_prepare_articles(file_paths):
-    """Read all articles and prepare metadata"""
+def read_and_prepare_articles(file_paths, store=None):
+    """Read all articles and prepare metadata (from an ArticleStore when one is given)"""
     articles_data = []
     successful_reads = 0
     
@@ -68,22 +99,21 @@ def read_and_prepare_articles(file_paths):
     
     for i, file_path in enumerate(file_paths, 1):
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                filename = Path(file_path).stem
-                
-                article_data = {
-                    'number': i,
-                    'filename': filename,
-                    'path': file_path,
-                    'length': len(content),
-                    'content': content
-                }
-                
-                articles_data.append(article_data)
-                successful_reads += 1
-                print(f"  ✓ Read Article {i}: {filename} ({len(content)} characters)")
-                
+            filename = Path(file_path).stem
+            content = read_article(file_path, store)
+            
+            article_data = {
+                'number': i,
+                'filename': filename,
+                'path': file_path,
+                'length': len(content),
+                'content': content
+            }
+            
+            articles_data.append(article_data)
+            successful_reads += 1
+            print(f"  ✓ Read Article {i}: {filename} ({len(content)} characters)")
+            
         except Exception as e:
             print(f"  ✗ Error reading {file_path}: {e}")
             continue
@@ -197,13 +227,7 @@ def analyze_single_batch(articles_data):
     prompt = build_prompt_for_batch(articles_data)
     
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=8000,
-            temperature=0.3,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return create_message("cluster_summary", prompt)
     except Exception as e:
         return f"Error in API call: {e}"
 
@@ -224,16 +248,10 @@ def analyze_multiple_batches(articles_data, max_chars):
         prompt = build_prompt_for_batch(batch, i, len(batches))
         
         try:
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=8000,
-                temperature=0.3,
-                messages=[{"role": "user", "content": prompt}]
-            )
             batch_results.append({
                 'batch_num': i,
                 'articles': [article['filename'] for article in batch],
-                'result': response.content[0].text
+                'result': create_message("batch_summary", prompt)
             })
             print(f"  ✓ Batch {i} complete")
         except Exception as e:
@@ -316,17 +334,11 @@ Here are the batch results to synthesize:
 Please create a coherent synthesis that treats this as a single cluster analysis."""
 
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=8000,
-            temperature=0.3,
-            messages=[{"role": "user", "content": synthesis_prompt}]
-        )
-        return response.content[0].text
+        return create_message("synthesis", synthesis_prompt)
     except Exception as e:
         return f"Error in synthesis: {e}\n\n=== RAW BATCH RESULTS ===\n{combined_results}"
 
-def analyze_article_cluster(file_paths, cluster_name="articles", max_chars=100000):
+def analyze_article_cluster(file_paths, cluster_name="articles", max_chars=100000, store=None):
     """
     Main function to analyze a cluster of articles
     Automatically handles batching if content is too large
@@ -335,7 +347,7 @@ def analyze_article_cluster(file_paths, cluster_name="articles", max_chars=10000
         return "No files found to analyze."
     
     # Read and prepare all articles
-    articles_data, total_chars = read_and_prepare_articles(file_paths)
+    articles_data, total_chars = read_and_prepare_articles(file_paths, store=store)
     
     if not articles_data:
         return "No files could be read successfully."
@@ -354,6 +366,7 @@ def main():
     parser.add_argument("--output", help="Output file name")
     parser.add_argument("--cluster-name", default="articles", help="Name for this cluster")
     parser.add_argument("--max-chars", type=int, default=100000, help="Maximum characters per batch (default: 100000)")
+    parser.add_argument("--store", help="Article store path prefix (see article_store.py); built from the input if missing")
     
     args = parser.parse_args()
     
@@ -368,9 +381,14 @@ def main():
         print(f"No files found matching: {args.input}")
         return
     
+    # Open (or build) the shared article store
+    store = None
+    if args.store:
+        store = ArticleStore(args.store) if ArticleStore.exists(args.store) else ArticleStore.build(article_files, args.store)
+    
     # Run the analysis
     print(f"Analyzing {len(article_files)} articles in cluster '{args.cluster_name}'...")
-    result = analyze_article_cluster(file_paths=article_files, cluster_name=args.cluster_name, max_chars=args.max_chars)
+    result = analyze_article_cluster(file_paths=article_files, cluster_name=args.cluster_name, max_chars=args.max_chars, store=store)
     
     # Determine output filename
     output_filename = args.output or f"{args.cluster_name}_analysis_results.txt"
@@ -383,6 +401,7 @@ def main():
         output_file.write(result)
     
     print(f"Analysis complete! Results saved to '{output_filename}'")
+    print(router.report())
     print("\n" + "="*60)
     print(result)
 
@@ -0,0 +1,66 @@
+import random
+
+import pandas as pd
+import pytest
+
+from amstar_rating import CRITICAL_DOMAINS, NON_CRITICAL_ITEMS, rate_items
+from data_extraction_AMSTAR import DualExtractionAPI
+
+ITEM_KEYS = list(CRITICAL_DOMAINS) + NON_CRITICAL_ITEMS
+VALUES = [
+    "Yes. The protocol was registered in PROSPERO.",
+    "No. No list of excluded studies was provided.",
+    "Partial Yes. Two databases were searched.",
+    "Not applicable. No meta-analysis was performed.",
+    "yes - stated in the methods",
+    "NO",
+    "Unclear from the text.",
+    "",
+    None,  # item missing from the results
+]
+
+
+def random_articles(n, seed=0):
+    rng = random.Random(seed)
+    articles = {f"article_{i}": {key: rng.choice(VALUES) for key in ITEM_KEYS} for i in range(n)}
+    # Partial Yes on items that only allow Yes/No, and articles with no flaws or all flaws
+    articles['partial_on_yes_no_items'] = {key: "Partial Yes." if key in NON_CRITICAL_ITEMS else "Yes."
+                                          for key in ITEM_KEYS}
+    articles['all_not_applicable'] = {key: "Not applicable" for key in ITEM_KEYS}
+    articles['all_missing'] = {key: None for key in ITEM_KEYS}
+    articles['all_no'] = {key: "No." for key in ITEM_KEYS}
+    return articles
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return DualExtractionAPI("test-key")
+
+
+def test_vectorized_rating_matches_per_article_rating(extractor):
+    articles = random_articles(200)
+    items = pd.DataFrame.from_dict(articles, orient='index')
+    vectorized = rate_items(items)
+
+    for article_id, values in articles.items():
+        results = [{'Field': key, 'Value': value} for key, value in values.items() if value is not None]
+        expected = extractor.calculate_amstar_overall_rating(results)
+        row = vectorized.loc[article_id]
+        assert row['critical_flaws'] == expected['critical_flaws'], article_id
+        assert row['non_critical_weaknesses'] == expected['non_critical_weaknesses'], article_id
+        assert row['overall_rating'] == expected['overall_rating'], article_id
+
+
+def test_rating_edge_cases():
+    articles = random_articles(0)
+    ratings = rate_items(pd.DataFrame.from_dict(articles, orient='index'))['overall_rating']
+    assert ratings['partial_on_yes_no_items'] == "MODERATE"
+    assert ratings['all_not_applicable'] == "HIGH"
+    assert ratings['all_missing'] == "HIGH"
+    assert ratings['all_no'] == "CRITICALLY LOW"
+
+
+def test_missing_item_columns_are_not_flaws():
+    items = pd.DataFrame({'Item_2': ["No."], 'Item_4': ["Yes."]}, index=["partial_sheet"])
+    row = rate_items(items).loc["partial_sheet"]
+    assert (row['critical_flaws'], row['non_critical_weaknesses'], row['overall_rating']) == (1, 0, "LOW")
@@ -0,0 +1,34 @@
+from document_text import normalize_pages
+
+
+def risk_of_bias_page(number, studies):
+    lines = ["Journal of Affective Disorders 2021", f"Table S{number}. Risk of bias (Cochrane RoB 2)"]
+    for study, rating, n in studies:
+        lines += [study, rating, "Yes", "No", str(n)]
+    lines += ["Downloaded from https://example.org on 1 May 2022", str(number)]
+    return "\n".join(lines)
+
+
+def test_table_cells_survive_header_footer_removal():
+    pages = [
+        risk_of_bias_page(1, [("Smith 2010", "Low", 120), ("Jones 2012", "High", 48)]),
+        risk_of_bias_page(2, [("Lee 2014", "Unclear", 300), ("Khan 2015", "Low", 48)]),
+        risk_of_bias_page(3, [("Park 2016", "High", 75), ("Ortiz 2018", "Low", 210)]),
+        risk_of_bias_page(4, [("Brown 2019", "Unclear", 64), ("Ng 2020", "Low", 48)]),
+    ]
+    lines = normalize_pages(pages).splitlines()
+
+    # Running header, download stamp and page numbers are gone
+    assert "Journal of Affective Disorders 2021" not in lines
+    assert not any(line.startswith("Downloaded from") for line in lines)
+    assert lines.count("4") == 0
+
+    # Every rating and sample-size cell is kept
+    assert lines.count("Low") == 4
+    assert lines.count("High") == 2
+    assert lines.count("Unclear") == 2
+    assert lines.count("Yes") == 8
+    assert lines.count("No") == 8
+    for n in ("120", "300", "75", "210", "64"):
+        assert n in lines
+    assert lines.count("48") == 3
@@ -0,0 +1,50 @@
+import time
+
+from work_queue import WorkQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    queue = WorkQueue(str(tmp_path / "queue.db"), **kwargs)
+    queue.enqueue([str(tmp_path / "article_a.txt")])
+    return queue
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.2)
+    assert queue.claim("w1") == ("article_a", str(tmp_path / "article_a.txt"), "full")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert queue.heartbeat("article_a", "w1")
+        assert queue.claim("w2") is None
+    queue.complete("article_a", "w1")
+    assert queue.job("article_a")['status'] == 'done'
+
+
+def test_expired_lease_is_reclaimed_then_failed_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.05, max_attempts=2)
+    assert queue.claim("w1") is not None
+    time.sleep(0.1)
+
+    # The first worker died: its lease expires and another worker picks the article up
+    assert queue.claim("w2") is not None
+    job = queue.job("article_a")
+    assert (job['status'], job['worker'], job['attempts']) == ('leased', 'w2', 2)
+    assert not queue.heartbeat("article_a", "w1")
+
+    # The second worker dies too: the article is failed rather than handed out again
+    time.sleep(0.1)
+    assert queue.claim("w3") is None
+    job = queue.job("article_a")
+    assert (job['status'], job['attempts']) == ('failed', 2)
+    assert "Lease expired" in job['error']
+
+
+def test_fail_requeues_until_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.claim("w1")
+    queue.fail("article_a", "w1", RuntimeError("boom"))
+    assert queue.job("article_a")['status'] == 'pending'
+    queue.claim("w1")
+    queue.fail("article_a", "w1", RuntimeError("boom"))
+    job = queue.job("article_a")
+    assert (job['status'], job['error']) == ('failed', 'boom')
@@ -0,0 +1,82 @@
+"""
+Cluster sweeps over one reduced embedding for the topic-model search.
+
+Rather than refitting the whole BERTopic pipeline for every candidate number of
+topics, the UMAP-reduced embedding is clustered for all k in one pass and
+BERTopic only builds representations from the precomputed labels
+(hdbscan_model=BaseCluster(), fit(docs, embeddings, y=labels)). All methods are
+seeded so a sweep is reproducible.
+
+- 'minibatch': MiniBatchKMeans warm-started across increasing k (the previous
+  centres plus k-means++ seeds for the new ones)
+- 'hierarchical': one MiniBatchKMeans over-clustering into micro-clusters and a
+  single Ward linkage over their centroids, cut at every k
+- 'kmeans': an independent full-batch KMeans per k (the original sweep, seeded)
+"""
+
+import numpy as np
+
+SWEEP_METHODS = ('minibatch', 'hierarchical', 'kmeans')
+
+
+def _seed_new_centres(reduced, centres, labels, n_new, rng):
+    """k-means++ style: pick n_new points with probability proportional to their squared distance to the centres"""
+    new = []
+    dist = ((reduced - centres[labels]) ** 2).sum(axis=1)
+    for _ in range(n_new):
+        total = dist.sum()
+        index = rng.choice(len(reduced), p=dist / total) if total > 0 else rng.integers(len(reduced))
+        new.append(reduced[index])
+        dist = np.minimum(dist, ((reduced - reduced[index]) ** 2).sum(axis=1))
+    return np.vstack([centres] + new)
+
+
+def sweep_minibatch(reduced, ks, seed=42, batch_size=4096):
+    """MiniBatchKMeans for increasing k, each fit starting from the previous k's centres"""
+    from sklearn.cluster import MiniBatchKMeans
+
+    rng = np.random.default_rng(seed)
+    labels = {}
+    centres = None
+    for k in sorted(ks):
+        if centres is None:
+            init, n_init = 'k-means++', 3
+        else:
+            init, n_init = _seed_new_centres(reduced, centres, model.labels_, k - len(centres), rng), 1
+        model = MiniBatchKMeans(n_clusters=k, init=init, n_init=n_init, batch_size=batch_size,
+                                random_state=seed).fit(reduced)
+        centres = model.cluster_centers_
+        labels[k] = model.labels_
+    return labels
+
+
+def sweep_hierarchical(reduced, ks, seed=42, batch_size=4096, micro_clusters=None):
+    """Over-cluster once, build one Ward tree over the micro-cluster centroids and cut it at every k"""
+    from scipy.cluster.hierarchy import cut_tree, linkage
+    from sklearn.cluster import MiniBatchKMeans
+
+    ks = sorted(ks)
+    n_micro = min(len(reduced), micro_clusters or max(20 * ks[-1], 200))
+    micro = MiniBatchKMeans(n_clusters=n_micro, n_init=1, batch_size=batch_size, random_state=seed).fit(reduced)
+    tree = linkage(micro.cluster_centers_, method='ward')
+    cuts = cut_tree(tree, n_clusters=ks)
+    return {k: cuts[micro.labels_, i] for i, k in enumerate(ks)}
+
+
+def sweep_kmeans(reduced, ks, seed=42, n_init=10):
+    from sklearn.cluster import KMeans
+    return {k: KMeans(n_clusters=k, n_init=n_init, random_state=seed).fit_predict(reduced) for k in ks}
+
+
+def sweep_clusters(reduced, ks, method='minibatch', seed=42, batch_size=4096):
+    """Labels for every k in ks as {k: labels}, clustering the reduced embedding with the chosen method"""
+    reduced = np.ascontiguousarray(reduced, dtype=np.float32)
+    if method == 'minibatch':
+        labels = sweep_minibatch(reduced, ks, seed, batch_size)
+    elif method == 'hierarchical':
+        labels = sweep_hierarchical(reduced, ks, seed, batch_size)
+    elif method == 'kmeans':
+        labels = sweep_kmeans(reduced, ks, seed)
+    else:
+        raise ValueError(f"Unknown clustering method {method!r}; choose from {', '.join(SWEEP_METHODS)}")
+    return {k: np.asarray(labels[k], dtype=int) for k in ks}
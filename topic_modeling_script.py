@@ -1,23 +1,14 @@
-from gensim.models import CoherenceModel
-from gensim.corpora import Dictionary
-from sentence_transformers import SentenceTransformer
-from umap import UMAP
-from bertopic.dimensionality import BaseDimensionalityReduction
-from bertopic.representation import KeyBERTInspired, MaximalMarginalRelevance, OpenAI, PartOfSpeech
-from sklearn.feature_extraction.text import CountVectorizer
-from bertopic.representation._base import BaseRepresentation
-from typing import Mapping, List, Tuple
-import anthropic
-import pandas as pd
-from sklearn.cluster import KMeans
-import numpy as np
-from bertopic import BERTopic
+import argparse
+
+from embedding_backend import EmbeddingBackend, EmbeddingCache, encode_cached
+from topic_clustering import SWEEP_METHODS, sweep_clusters
 
 # this is the csv with abstracts included
 dataset="abstracts.csv"
-# Extract abstracts to train on and corresponding titles
-abstracts = dataset["Abstract"]
-titles = dataset["Title"]
+# how the reduced embeddings are clustered for every k at once: "hierarchical", "minibatch" or "kmeans"
+cluster_method="hierarchical"
+embedding_models=["pritamdeka/S-PubMedBert-MS-MARCO","all-MiniLM-L6-v2"]
+topic_counts=[7,10,13,16]
 
 def bertopic_to_gensim_format(topic_model, documents):
     #"""Convert BERTopic topics to format compatible with gensim coherence"""
@@ -58,72 +49,134 @@ def calculate_topic_diversity(model, topk=10):
     return unique_words / total_words if total_words > 0 else 0
 
 
-umap_model = UMAP(n_neighbors=15, n_components=4, min_dist=0.0, metric='cosine', random_state=42)
+def parse_args(argv=None):
+  parser = argparse.ArgumentParser(description="Sweep BERTopic models over embedding models and topic counts")
+  parser.add_argument("--dataset", default=dataset, help=f"CSV with Abstract and Title columns (default: {dataset})")
+  parser.add_argument("--cluster-method", choices=SWEEP_METHODS, default=cluster_method, help="How every k is clustered")
+  parser.add_argument("--models", nargs="+", default=embedding_models, help="Sentence-transformer models to compare")
+  parser.add_argument("--ks", type=int, nargs="+", default=topic_counts, help="Numbers of topics to compare")
+  parser.add_argument("--output", default="model_out", help="Directory for the saved best model")
+  parser.add_argument("--dry-run", action="store_true", help="Check the dataset and print the sweep without fitting")
+  return parser.parse_args(argv)
 
-vectorizer_model = CountVectorizer(stop_words="english", min_df=2, ngram_range=(1, 2))
 
+def main(argv=None):
+  args = parse_args(argv)
+  import pandas as pd
 
-## test different models
+  # Extract abstracts to train on and corresponding titles
+  data = pd.read_csv(args.dataset)
+  abstracts = data["Abstract"]
+  titles = data["Title"]
+  if args.dry_run:
+    print(f"{len(abstracts)} abstracts; models: {', '.join(args.models)}; k: {args.ks}; clustering: {args.cluster_method}")
+    return
 
+  # Heavy dependencies are imported only once there is work to do
+  from bertopic import BERTopic
+  from bertopic.cluster import BaseCluster
+  from bertopic.dimensionality import BaseDimensionalityReduction
+  from bertopic.representation import KeyBERTInspired
+  from gensim.corpora import Dictionary
+  from gensim.models import CoherenceModel
+  from sklearn.feature_extraction.text import CountVectorizer
+  from umap import UMAP
 
+  umap_model = UMAP(n_neighbors=15, n_components=4, min_dist=0.0, metric='cosine', random_state=42)
 
+  vectorizer_model = CountVectorizer(stop_words="english", min_df=2, ngram_range=(1, 2))
 
-top_mods = {}
-# All representation models
-representation_model = {
-    "KeyBERT": keybert_model}
 
-mods = ["pritamdeka/S-PubMedBert-MS-MARCO","all-MiniLM-L6-v2"]
-EVAL=pd.DataFrame(columns=['col1', 'col2', 'col3', 'col4'])
-for em_model in mods:
-# Pre-calculate embeddings - we can use thre
-  embedding_model = SentenceTransformer(em_model)
-  embeddings = embedding_model.encode(abstracts, show_progress_bar=True)
-  for k in [7,10,13,16]:
-    cluster_model = KMeans(n_clusters=k)
-    topic_model = BERTopic(
-# Pipeline models
-    embedding_model=embedding_model,
-    umap_model=umap_model,  #umap_model=empty_dimensionality_model,
-    hdbscan_model=cluster_model,
-    #hdbscan_model=HDBSCAN(min_cluster_size=4, metric='euclidean', cluster_selection_method='eom', prediction_data=True),
-    vectorizer_model=vectorizer_model,
-    representation_model=representation_model,
-    calculate_probabilities=True,
+  ## test different models
 
-  # Hyperparameters
-    top_n_words=20,
-    verbose=True
-    )
-    topics, probs = topic_model.fit_transform(abstracts, embeddings)
-    name=f'm_{em_model}_{k}'
-    top_mods[name]=topic_model
-    topic_words = bertopic_to_gensim_format(topic_model, abstracts)
-    # Preprocess documents
-    processed_docs = [doc.lower().split() for doc in abstracts]
-    dictionary = Dictionary(processed_docs)
 
 
-# Calculate coherence
-    coherence_model_m = CoherenceModel(
-    topics=topic_words,
-    texts=processed_docs,
-    dictionary=dictionary,
-    coherence='u_mass'
-    )
 
+  # KeyBERT representations are only built for the winning configuration
+  keybert_model = KeyBERTInspired()
+  representation_model = {
+    "KeyBERT": keybert_model}
+
+  # Preprocess documents once for the coherence scores
+  processed_docs = [doc.lower().split() for doc in abstracts]
+  dictionary = Dictionary(processed_docs)
+
+  mods = args.models
+  EVAL=pd.DataFrame(columns=['col1', 'col2', 'col3', 'col4'])
+  embedding_cache = EmbeddingCache()
+  # Only the best candidate's labels are kept; fitted candidate models are discarded
+  best = None
+  for em_model in mods:
+  # Pre-calculate embeddings (backend/batch size/threads from UMBRELLA_EMBEDDING_*; cached as float16)
+    backend = EmbeddingBackend.from_env(em_model)
+    embeddings = encode_cached(backend, abstracts, embedding_cache)
+    # Reduce once per embedding model and cluster every k from the same reduced space (seeded)
+    reduced = umap_model.fit_transform(embeddings)
+    labels_by_k = sweep_clusters(reduced, args.ks, method=args.cluster_method, seed=42)
+    for k, labels in labels_by_k.items():
+      # Candidates are scored on their c-TF-IDF words only: no embedding model, KeyBERT or probabilities
+      topic_model = BERTopic(
+      embedding_model=None,
+      umap_model=BaseDimensionalityReduction(),
+      hdbscan_model=BaseCluster(),
+      vectorizer_model=vectorizer_model,
+      top_n_words=20,
+      verbose=True
+      )
+      topic_model.fit(abstracts, embeddings, y=labels)
+      topic_words = bertopic_to_gensim_format(topic_model, abstracts)
+
+
+  # Calculate coherence
+      coherence_model_m = CoherenceModel(
+      topics=topic_words,
+      texts=processed_docs,
+      dictionary=dictionary,
+      coherence='u_mass'
+      )
+
+
+      coherence_score_m = coherence_model_m.get_coherence()
+      diversity_score = calculate_topic_diversity(topic_model)
+
+
+
+      x=[coherence_score_m,diversity_score,em_model,k]
+      EVAL.loc[len(EVAL)] = x
+
+      # u_mass coherence: higher (closer to zero) is better
+      if best is None or coherence_score_m > best['coherence']:
+        best = {'coherence': coherence_score_m, 'em_model': em_model, 'k': k, 'labels': labels}
+      del topic_model
+
+  print(f"Best model: {best['em_model']} with k={best['k']} (u_mass coherence {best['coherence']:.3f})")
+
+  ## fit the best model with the full representations and save it
+  backend = EmbeddingBackend.from_env(best['em_model'])
+  embeddings = encode_cached(backend, abstracts, embedding_cache)
+  topic_model = BERTopic(
+  # Pipeline models: dimensionality reduction and clustering already done in the sweep
+  embedding_model=backend.model,
+  umap_model=BaseDimensionalityReduction(),
+  hdbscan_model=BaseCluster(),
+  #hdbscan_model=HDBSCAN(min_cluster_size=4, metric='euclidean', cluster_selection_method='eom', prediction_data=True),
+  vectorizer_model=vectorizer_model,
+  representation_model=representation_model,
+  calculate_probabilities=True,
 
-    coherence_score_m = coherence_model_m.get_coherence()
-    diversity_score = calculate_topic_diversity(topic_model)
+  # Hyperparameters
+  top_n_words=20,
+  verbose=True
+  )
+  topics, probs = topic_model.fit_transform(abstracts, embeddings, y=best['labels'])
 
+  ## get information for the best model
+  topic_model.get_topic_info()
 
+  # Reduce dimensionality of embeddings, this step is optional but much faster to perform iteratively:
+  reduced_embeddings = UMAP(n_neighbors=10, n_components=2, min_dist=0.0, metric='cosine').fit_transform(embeddings)
+  topic_model.save(args.output, serialization="safetensors")
 
-    x=[coherence_score_m,diversity_score,em_model,k]
-    EVAL.loc[len(EVAL)] = x
-    
-    ## get information for the best model
-    topic_model.get_topic_info()
 
-    # Reduce dimensionality of embeddings, this step is optional but much faster to perform iteratively:
-reduced_embeddings = UMAP(n_neighbors=10, n_components=2, min_dist=0.0, metric='cosine').fit_transform(embeddings)
-topic_model.save("model_out", serialization="safetensors")
\ No newline at end of file
+if __name__ == "__main__":
+  main()
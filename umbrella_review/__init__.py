@@ -0,0 +1,47 @@
+"""
+Importable entry point for the umbrella review scripts.
+
+The scripts stay top-level modules so their existing command lines keep
+working; this package puts them behind one CLI (the umbrella-review console
+script installed by pyproject.toml, or python -m umbrella_review from the
+repository root) and exposes their main classes as attributes that are
+imported on first access, so ``import umbrella_review`` itself loads nothing
+heavy.
+"""
+
+import importlib
+import os
+
+# Where the scripts live in a source checkout (next to this package)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# attribute -> module it is loaded from
+_LAZY_ATTRIBUTES = {
+    'DualExtractionAPI': 'data_extraction_AMSTAR',
+    'BatchAmstarAssessor': 'amstar_batch',
+    'analyze_article_cluster': 'summarize_articles',
+    'ArticleStore': 'article_store',
+    'load_document': 'document_text',
+    'QCSchema': 'qc_schema',
+    'load_qc_schema': 'qc_schema',
+    'ModelRouter': 'model_routing',
+    'ResultsStore': 'results_store',
+    'WorkQueue': 'work_queue',
+    'FolderWatcher': 'watch_folder',
+    'EmbeddingBackend': 'embedding_backend',
+    'sweep_clusters': 'topic_clustering',
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,5 @@
+import sys
+
+from umbrella_review.cli import main
+
+sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Single command line for the umbrella review scripts.
+
+    python -m umbrella_review COMMAND [ARGS...]
+    python -m umbrella_review summarize /path/to/articles/ --cluster-name my_cluster
+    python -m umbrella_review startup            # measure cold-start time of every command
+
+Each command runs the matching script's own command line, and the script's
+module is only imported once its command is chosen, so ``--help`` and the
+other commands never pay for anthropic, BERTopic, gensim or torch.
+"""
+
+import argparse
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import time
+
+from umbrella_review import REPO_ROOT
+
+# command -> (script module, one-line description)
+COMMANDS = {
+    'extract': ('data_extraction_AMSTAR', "AMSTAR 2 + study-data extraction for one article"),
+    'amstar-batch': ('amstar_batch', "Batched corpus-level AMSTAR items 1, 10 and 16"),
+    'summarize': ('summarize_articles', "Summarize a cluster of articles"),
+    'topics': ('topic_modeling_script', "BERTopic model sweep over the abstracts"),
+    'store': ('article_store', "Build or inspect the memory-mapped article store"),
+    'text': ('document_text', "Extract and cache text from PDF/DOCX files"),
+    'results': ('results_store', "Query or maintain the results database"),
+    'queue': ('work_queue', "Shared work queue: enqueue, worker, status"),
+    'watch': ('watch_folder', "Watch the article folders and queue new files"),
+    'embeddings': ('embedding_backend', "Compare an embedding backend against fp32"),
+    'mock-server': ('mock_claude_server', "Local mock of the Messages API"),
+    'bench-extraction': ('benchmark_extraction', "Offline extraction/summarization benchmark"),
+    'bench-topics': ('benchmark_topic_modeling', "Stage-by-stage topic-modeling benchmark"),
+}
+
+
+def print_help():
+    print(__doc__.strip().splitlines()[0])
+    print("\nusage: python -m umbrella_review COMMAND [ARGS...]\n\ncommands:")
+    width = max(len(name) for name in list(COMMANDS) + ['startup'])
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<{width}}  {description}")
+    print(f"  {'startup':<{width}}  Measure cold-start time of every command")
+    print("\nRun 'python -m umbrella_review COMMAND --help' for a command's options.")
+
+
+def run_command(command, argv):
+    """Run a script's __main__ block with argv, as if it had been started directly"""
+    module = COMMANDS[command][0]
+    sys.argv = [module] + list(argv)
+    try:
+        # alter_sys so multiprocessing 'spawn' children can re-import the script as __main__
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        return e.code
+    return 0
+
+
+def _time_process(args, repeats):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')]))
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def measure_startup(commands=None, repeats=5):
+    """Median wall time of a fresh interpreter for each command's --help and for importing its module"""
+    rows = [
+        ('python', _time_process(['-c', 'pass'], repeats), None),
+        ('umbrella_review --help', _time_process(['-m', 'umbrella_review', '--help'], repeats),
+         _time_process(['-c', 'import umbrella_review'], repeats)),
+    ]
+    for command in commands or COMMANDS:
+        module = COMMANDS[command][0]
+        rows.append((f"{command} --help", _time_process(['-m', 'umbrella_review', command, '--help'], repeats),
+                     _time_process(['-c', f'import {module}'], repeats)))
+    return rows
+
+
+def startup(argv):
+    parser = argparse.ArgumentParser(prog="python -m umbrella_review startup",
+                                     description="Measure cold-start time of the CLI and of importing each script")
+    parser.add_argument("commands", nargs="*", metavar="COMMAND", help="Commands to time (default: all)")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per measurement; the median is reported")
+    args = parser.parse_args(argv)
+    unknown = [command for command in args.commands if command not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s): {', '.join(unknown)}")
+
+    print(f"{'command':<32} {'--help (s)':>10} {'import (s)':>10}")
+    for name, help_time, import_time in measure_startup(args.commands, args.repeats):
+        import_text = f"{import_time:10.3f}" if import_time is not None else f"{'':>10}"
+        print(f"{name:<32} {help_time:10.3f} {import_text}", flush=True)
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print_help()
+        return 0 if argv else 1
+
+    command, rest = argv[0], argv[1:]
+    if command == 'startup':
+        return startup(rest)
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}\n")
+        print_help()
+        return 2
+    return run_command(command, rest)
@@ -0,0 +1,290 @@
+"""
+Watch-folder daemon for continuous ingestion of newly retrieved articles.
+
+Watches the article directory and its Supplements/ and Protocols/ folders
+(inotify through the optional watchdog package, otherwise by polling). Files
+are only acted on once their size and mtime have been stable for the debounce
+period, so half-copied files are never read. New or changed articles are
+queued for a full extraction in the work queue; a supplement or protocol that
+arrives after the article was processed queues an AMSTAR-only reassessment.
+
+    python watch_folder.py /path/to/articles --queue queue.db --qc DataExtract_QC.csv --results results.db --workers 2
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+from article_store import COMPANION_EXTENSIONS, _list_dir, find_companion
+from work_queue import WorkQueue
+
+ARTICLE_EXTENSIONS = ('.txt',)
+# (folder, file name suffix) for each companion document, as in load_supplement_files
+COMPANIONS = (('Supplements', '_supp'), ('Protocols', '_protocol'))
+
+
+def file_signature(path):
+    """'size:mtime_ns' for a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class FolderWatcher:
+    """Debounces file changes under an article directory and turns them into queue jobs"""
+
+    def __init__(self, article_dir, queue, debounce_seconds=30, poll_seconds=10, results_path=None, backfill=False):
+        self.article_dir = os.path.abspath(article_dir)
+        self.queue = queue
+        self.results_path = results_path
+        self.backfill = backfill
+        self.debounce_seconds = debounce_seconds
+        self.poll_seconds = poll_seconds
+        self.lock = threading.Lock()
+        self.pending = {}    # path -> [signature, time the signature was first seen]
+        self.snapshot = {}   # path -> signature at the last poll
+
+    def folders(self):
+        return [self.article_dir] + [os.path.join(self.article_dir, folder) for folder, _ in COMPANIONS]
+
+    def article_for(self, path):
+        """Article id a watched file belongs to, or None for unrelated files"""
+        folder, name = os.path.split(os.path.abspath(path))
+        stem, ext = os.path.splitext(name)
+        if folder == self.article_dir:
+            return stem if ext in ARTICLE_EXTENSIONS else None
+        for companion_folder, suffix in COMPANIONS:
+            if folder != os.path.join(self.article_dir, companion_folder):
+                continue
+            # Companions may have no extension, in which case the suffix ends the name
+            for candidate in (stem, name):
+                if candidate.endswith(suffix) and candidate != suffix:
+                    return candidate[:-len(suffix)]
+        return None
+
+    def scan(self):
+        """Signatures of every relevant file in the watched folders"""
+        found = {}
+        for folder in self.folders():
+            for name in _list_dir(folder):
+                path = os.path.join(folder, name)
+                if self.article_for(path) is not None:
+                    found[path] = file_signature(path)
+        return found
+
+    def mark(self, path, now=None):
+        """Record a change event; the path is handled once it has been quiet for the debounce period"""
+        if self.article_for(path) is None:
+            return
+        now = time.time() if now is None else now
+        with self.lock:
+            self.pending[os.path.abspath(path)] = [file_signature(path), now]
+
+    def poll(self):
+        """Polling fallback: diff a fresh scan against the previous one"""
+        current = self.scan()
+        for path, signature in current.items():
+            if self.snapshot.get(path) != signature:
+                self.mark(path)
+        self.snapshot = current
+
+    def prime(self):
+        """Queue anything new or changed since the daemon last ran, treating old files as already settled"""
+        now = time.time()
+        self.snapshot = self.scan()
+        self.record_baseline()
+        with self.lock:
+            for path, signature in self.snapshot.items():
+                mtime = os.stat(path).st_mtime if signature else now
+                since = now - self.debounce_seconds if now - mtime >= self.debounce_seconds else now
+                self.pending[path] = [signature, since]
+
+    def record_baseline(self):
+        """
+        Record articles already in the folder that the queue has never seen as processed, so starting
+        the watcher on an existing corpus does not extract it again. With a results path only articles
+        that have saved results count; without one, all of them do unless backfill is set.
+        """
+        from work_queue import processed_articles
+
+        if self.results_path:
+            processed = processed_articles(self.results_path)
+        elif self.backfill:
+            processed = set()
+        else:
+            processed = None
+        articles = {self.article_for(path) for path in self.snapshot}
+        recorded = 0
+        for article_id in sorted(articles):
+            if (processed is not None and article_id not in processed) or self.queue.job(article_id) is not None:
+                continue
+            path, main, companions = self.fingerprints(article_id)
+            if main is not None:
+                self.queue.record_processed(article_id, path, main, companions)
+                recorded += 1
+        if recorded:
+            print(f"{recorded} article(s) already processed; only later changes will be queued")
+
+    def settled(self):
+        """Article ids whose changed files have kept the same size and mtime for the debounce period"""
+        now = time.time()
+        articles = set()
+        with self.lock:
+            for path, entry in list(self.pending.items()):
+                signature = file_signature(path)
+                if signature is None:
+                    del self.pending[path]
+                elif signature != entry[0]:
+                    entry[:] = [signature, now]
+                elif now - entry[1] >= self.debounce_seconds:
+                    del self.pending[path]
+                    articles.add(self.article_for(path))
+        return articles
+
+    def fingerprints(self, article_id):
+        """(article path, article signature, combined supplement/protocol signature); (None, None, None) if no article"""
+        for ext in ARTICLE_EXTENSIONS:
+            main_path = os.path.join(self.article_dir, f"{article_id}{ext}")
+            main = file_signature(main_path)
+            if main:
+                break
+        else:
+            return None, None, None
+        parts = []
+        for folder_name, suffix in COMPANIONS:
+            folder = os.path.join(self.article_dir, folder_name)
+            path = find_companion(article_id, folder, suffix, _list_dir(folder), COMPANION_EXTENSIONS)
+            parts.append(f"{os.path.basename(path)}={file_signature(path)}" if path else "")
+        return main_path, main, "|".join(parts)
+
+    def dispatch(self, article_id):
+        """Queue a full extraction for new/changed articles, or an AMSTAR-only run for new companions"""
+        path, main, companions = self.fingerprints(article_id)
+        if main is None:
+            # Supplement or protocol dropped before its article; the article's arrival queues both
+            return None
+
+        job = self.queue.job(article_id)
+        if job is None or (job['fingerprint'] is not None and job['fingerprint'] != main):
+            task = 'full'
+        elif job['fingerprint'] is None:
+            # Queued by hand before the watcher knew about it: compare against when it last finished or failed
+            finished = job['finished_at'] if job['status'] in ('done', 'failed') else None
+            if finished is None:
+                # Still pending or leased, so the current files will be read anyway
+                self.queue.set_fingerprints(article_id, main, companions)
+                return None
+            if os.stat(path).st_mtime > finished:
+                task = 'full'
+            elif self._companions_newer(article_id, finished):
+                # A failed job has no results to keep
+                task = 'amstar' if job['status'] == 'done' else 'full'
+            else:
+                self.queue.set_fingerprints(article_id, main, companions)
+                return None
+        elif job['companion_fingerprint'] != companions:
+            task = 'amstar'
+        else:
+            return None
+
+        task = self.queue.submit(article_id, path, task, main, companions)
+        print(f"Queued {article_id} ({'full extraction' if task == 'full' else 'AMSTAR reassessment'})")
+        return task
+
+    def _companions_newer(self, article_id, since):
+        for folder_name, suffix in COMPANIONS:
+            folder = os.path.join(self.article_dir, folder_name)
+            path = find_companion(article_id, folder, suffix, _list_dir(folder), COMPANION_EXTENSIONS)
+            if path and os.stat(path).st_mtime > since:
+                return True
+        return False
+
+    def start_observer(self):
+        """inotify (or the platform equivalent) via watchdog; returns None when it is not installed"""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, 'dest_path', None)):
+                    if path:
+                        watcher.mark(path)
+
+        observer = Observer()
+        # Recursive so Supplements/ and Protocols/ are covered even if they are created later
+        observer.schedule(Handler(), self.article_dir, recursive=True)
+        observer.start()
+        return observer
+
+    def run(self, use_inotify=True, stop=None):
+        """Watch until stop is set (or forever), dispatching settled articles once a second"""
+        stop = stop or threading.Event()
+        self.prime()
+        observer = self.start_observer() if use_inotify else None
+        print(f"Watching {self.article_dir} ({'inotify' if observer else f'polling every {self.poll_seconds} s'}, "
+              f"{self.debounce_seconds} s debounce)")
+        last_poll = time.time()
+        try:
+            while not stop.is_set():
+                if observer is None and time.time() - last_poll >= self.poll_seconds:
+                    self.poll()
+                    last_poll = time.time()
+                for article_id in sorted(self.settled()):
+                    self.dispatch(article_id)
+                stop.wait(1)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+
+def _worker_process(db_path, qc_csv_path, results_path, requests_per_minute):
+    from work_queue import run_worker
+    run_worker(WorkQueue(db_path), qc_csv_path, results_path, requests_per_minute, exit_when_empty=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Watch an article folder and queue new or changed articles for extraction")
+    parser.add_argument("article_dir", help="Folder with article .txt files and Supplements/ and Protocols/ subfolders")
+    parser.add_argument("--queue", required=True, help="Work queue database (see work_queue.py)")
+    parser.add_argument("--qc", help="QC sheet CSV (needed with --workers)")
+    parser.add_argument("--results", help="Results database (.db) or directory for per-article CSVs (needed with --workers)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes to run alongside the watcher")
+    parser.add_argument("--requests-per-minute", type=int, default=50, help="Request budget shared by all workers")
+    parser.add_argument("--debounce", type=float, default=30, help="Seconds a file must stay unchanged before it is read")
+    parser.add_argument("--poll", type=float, default=10, help="Polling interval when inotify is unavailable")
+    parser.add_argument("--no-inotify", action="store_true", help="Always poll (e.g. on network filesystems)")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Without --results, also queue articles already in the folder that the queue has never seen")
+    args = parser.parse_args()
+
+    if args.workers and not (args.qc and args.results):
+        parser.error("--workers needs --qc and --results")
+
+    workers = []
+    for _ in range(args.workers):
+        process = multiprocessing.get_context("spawn").Process(
+            target=_worker_process, args=(args.queue, args.qc, args.results, args.requests_per_minute), daemon=True)
+        process.start()
+        workers.append(process)
+
+    watcher = FolderWatcher(args.article_dir, WorkQueue(args.queue), args.debounce, args.poll, args.results, args.backfill)
+    try:
+        watcher.run(use_inotify=not args.no_inotify)
+    except KeyboardInterrupt:
+        print("Stopping watcher")
+    finally:
+        for process in workers:
+            process.terminate()
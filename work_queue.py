@@ -0,0 +1,366 @@
+"""
+SQLite work queue so several worker processes (or hosts on a shared filesystem)
+can share one extraction run.
+
+Workers claim articles under a lease that a heartbeat thread keeps extending;
+leases of dead workers expire and the article is handed to someone else. All
+workers draw API requests from one token bucket stored in the same database,
+so together they stay within the account's rate limit.
+
+    python work_queue.py enqueue queue.db /path/to/articles/*.txt
+    python work_queue.py worker queue.db --qc DataExtract_QC.csv --results results.db
+    python work_queue.py status queue.db
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    article TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    task TEXT NOT NULL DEFAULT 'full',
+    fingerprint TEXT,
+    companion_fingerprint TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_expires);
+CREATE TABLE IF NOT EXISTS rate_budget (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """Article jobs with lease/heartbeat semantics and a shared request budget"""
+
+    def __init__(self, db_path, lease_seconds=600, max_attempts=3, timeout=60):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self, func, *args):
+        """Run func(cursor, *args) inside BEGIN IMMEDIATE so claims are atomic across processes"""
+        with self.lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(cur, *args)
+                cur.execute("COMMIT")
+                return result
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, paths, requeue=False):
+        """Add article paths (article id = file stem); existing jobs are left alone unless requeue"""
+        rows = [(Path(p).stem, p) for p in paths]
+        verb = "INSERT OR REPLACE" if requeue else "INSERT OR IGNORE"
+
+        def add(cur):
+            cur.executemany(f"{verb} INTO jobs (article, path) VALUES (?, ?)", rows)
+            return cur.rowcount
+        return self._transaction(add)
+
+    def submit(self, article, path, task, fingerprint=None, companion_fingerprint=None):
+        """
+        (Re)queue one article for a 'full' extraction or an 'amstar'-only reassessment.
+
+        A pending full job is never downgraded to amstar (it will read the new files anyway);
+        a job another worker holds is requeued so the newer files are picked up after it.
+        """
+        def put(cur):
+            row = cur.execute("SELECT task, status FROM jobs WHERE article = ?", (article,)).fetchone()
+            new_task = task
+            if row is not None and row[0] == 'full' and row[1] == 'pending':
+                new_task = 'full'
+            cur.execute(
+                "INSERT INTO jobs (article, path, task, fingerprint, companion_fingerprint) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (article) DO UPDATE SET path = excluded.path, task = excluded.task, "
+                "fingerprint = excluded.fingerprint, companion_fingerprint = excluded.companion_fingerprint, "
+                "status = 'pending', attempts = 0, error = NULL, worker = NULL, lease_expires = NULL",
+                (article, path, new_task, fingerprint, companion_fingerprint))
+            return new_task
+        return self._transaction(put)
+
+    def record_processed(self, article, path, fingerprint, companion_fingerprint):
+        """Add an article that was processed outside the queue as done, so only later changes queue it"""
+        def add(cur):
+            cur.execute("INSERT OR IGNORE INTO jobs (article, path, fingerprint, companion_fingerprint, status, finished_at) "
+                        "VALUES (?, ?, ?, ?, 'done', ?)", (article, path, fingerprint, companion_fingerprint, time.time()))
+        self._transaction(add)
+
+    def set_fingerprints(self, article, fingerprint, companion_fingerprint):
+        """Record the source files a job covers without requeueing it"""
+        def update(cur):
+            cur.execute("UPDATE jobs SET fingerprint = ?, companion_fingerprint = ? WHERE article = ?",
+                        (fingerprint, companion_fingerprint, article))
+        self._transaction(update)
+
+    def job(self, article):
+        """The queue row for one article as a dict, or None"""
+        cur = self.conn.execute("SELECT * FROM jobs WHERE article = ?", (article,))
+        row = cur.fetchone()
+        return None if row is None else dict(zip([d[0] for d in cur.description], row))
+
+    def claim(self, worker):
+        """Lease the next pending (or expired) article; returns (article, path, task) or None"""
+        def take(cur):
+            now = time.time()
+            # A worker that died or hung never reaches fail(), so expired leases are counted against max_attempts here
+            cur.execute(
+                "UPDATE jobs SET status = 'failed', lease_expires = NULL, finished_at = ?, "
+                "error = 'Lease expired after ' || attempts || ' attempts (worker died or hung)' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?", (now, now, self.max_attempts))
+            row = cur.execute(
+                "SELECT article, path, task FROM jobs WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ? AND attempts < ?) ORDER BY attempts, article LIMIT 1",
+                (now, self.max_attempts)).fetchone()
+            if row is None:
+                return None
+            cur.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE article = ?", (worker, now + self.lease_seconds, now, row[0]))
+            return row
+        return self._transaction(take)
+
+    def heartbeat(self, article, worker):
+        """Extend our lease; returns False if the lease was lost to another worker"""
+        def extend(cur):
+            cur.execute("UPDATE jobs SET lease_expires = ? WHERE article = ? AND worker = ? AND status = 'leased'",
+                        (time.time() + self.lease_seconds, article, worker))
+            return cur.rowcount == 1
+        return self._transaction(extend)
+
+    def complete(self, article, worker):
+        def done(cur):
+            cur.execute("UPDATE jobs SET status = 'done', finished_at = ?, error = NULL, lease_expires = NULL "
+                        "WHERE article = ? AND worker = ?", (time.time(), article, worker))
+        self._transaction(done)
+
+    def fail(self, article, worker, error):
+        """Return the article to the queue, or mark it failed after max_attempts"""
+        def failed(cur):
+            cur.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                        "error = ?, lease_expires = NULL, finished_at = ? WHERE article = ? AND worker = ?",
+                        (self.max_attempts, str(error)[:2000], time.time(), article, worker))
+        self._transaction(failed)
+
+    def acquire_request(self, requests_per_minute, burst=None):
+        """Block until the shared token bucket has a request available for this run"""
+        capacity = burst or max(1, requests_per_minute // 10)
+        rate = requests_per_minute / 60.0
+
+        def take(cur):
+            now = time.time()
+            row = cur.execute("SELECT tokens, updated FROM rate_budget WHERE id = 1").fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            if tokens >= 1:
+                cur.execute("INSERT OR REPLACE INTO rate_budget (id, tokens, updated) VALUES (1, ?, ?)", (tokens - 1, now))
+                return 0.0
+            cur.execute("INSERT OR REPLACE INTO rate_budget (id, tokens, updated) VALUES (1, ?, ?)", (tokens, now))
+            return (1 - tokens) / rate
+
+        while True:
+            wait = self._transaction(take)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def status(self):
+        """Counts per status plus throughput over the last 15 minutes and an ETA"""
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        now = time.time()
+        window = 15 * 60
+        recent, first_start = self.conn.execute(
+            "SELECT COUNT(*), MIN(started_at) FROM jobs WHERE status = 'done' AND finished_at > ?",
+            (now - window,)).fetchone()
+        # Measure over the time actually spent when the run is younger than the window
+        span_minutes = max(min(window, now - first_start), 1) / 60 if recent else window / 60
+        workers = self.conn.execute("SELECT COUNT(DISTINCT worker) FROM jobs WHERE status = 'leased' AND lease_expires > ?",
+                                    (now,)).fetchone()[0]
+        remaining = counts.get('pending', 0) + counts.get('leased', 0)
+        per_minute = recent / span_minutes
+        eta_minutes = remaining / per_minute if per_minute else None
+        return {
+            'counts': counts,
+            'active_workers': workers,
+            'articles_per_minute': per_minute,
+            'remaining': remaining,
+            'eta_minutes': eta_minutes,
+        }
+
+
+class QueueRateLimiter:
+    """Adapter passed to DualExtractionAPI so every API call draws from the shared budget"""
+
+    def __init__(self, queue, requests_per_minute):
+        self.queue = queue
+        self.requests_per_minute = requests_per_minute
+
+    def acquire(self):
+        self.queue.acquire_request(self.requests_per_minute)
+
+
+def load_previous_results(output, article_id):
+    """Rows already saved for an article (results database or per-article CSV), or [] if none"""
+    import pandas as pd
+    from results_store import ResultsStore, is_results_db
+
+    if is_results_db(output):
+        if not os.path.exists(output):
+            return []
+        with ResultsStore(output) as results_store:
+            return results_store.article(article_id).to_dict('records')
+    if not os.path.exists(output):
+        return []
+    return pd.read_csv(output, dtype=str, keep_default_na=False).to_dict('records')
+
+
+def processed_articles(results_path):
+    """Article ids that already have saved results (results database or directory of per-article CSVs)"""
+    from results_store import ResultsStore, is_results_db
+
+    if not results_path or not os.path.exists(results_path):
+        return set()
+    if is_results_db(results_path):
+        with ResultsStore(results_path) as results_store:
+            return set(results_store.articles())
+    return {Path(name).stem for name in os.listdir(results_path) if name.endswith('.csv')}
+
+
+def run_worker(queue, qc_csv_path, results_path, requests_per_minute=50, store_path=None, poll_seconds=10, exit_when_empty=True):
+    """Claim and process articles until the queue is drained"""
+    from article_store import ArticleStore, read_article
+    from data_extraction_AMSTAR import DualExtractionAPI, my_key
+    from results_store import is_results_db
+
+    worker = worker_id()
+    store = ArticleStore(store_path) if store_path and ArticleStore.exists(store_path) else None
+    extractor = DualExtractionAPI(my_key, store=store)
+    extractor.rate_limiter = QueueRateLimiter(queue, requests_per_minute)
+    # The shared budget paces requests, so the fixed sleeps between calls are not needed
+    extractor.between_calls_wait = 0
+    extractor.after_calls_wait = 0
+    # Several hosts may write one results database (see ResultsStore)
+    extractor.results_journal_mode = 'DELETE'
+
+    print(f"Worker {worker} started")
+    processed = 0
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            if exit_when_empty:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        article_id, path, task = job
+        print(f"\n[{worker}] Processing {article_id}...")
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(queue.lease_seconds / 3):
+                if not queue.heartbeat(article_id, worker):
+                    print(f"[{worker}] Lost lease on {article_id}")
+                    return
+
+        heartbeat = threading.Thread(target=beat, daemon=True)
+        heartbeat.start()
+        try:
+            article_text = read_article(path, store)
+            output = results_path if is_results_db(results_path) \
+                else os.path.join(results_path, f"{article_id}.csv")
+            previous = load_previous_results(output, article_id) if task == 'amstar' else None
+            if previous:
+                results = extractor.reassess_amstar(article_text, qc_csv_path, path, previous)
+            else:
+                results = extractor.process_article_with_qc_sheet(article_text, qc_csv_path, path)
+            extractor.save_results(results, output, article_id=article_id)
+            queue.complete(article_id, worker)
+            processed += 1
+            print(f"[{worker}] ✓ {article_id}")
+        except Exception as e:
+            queue.fail(article_id, worker, e)
+            print(f"[{worker}] ✗ {article_id}: {e}")
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    print(f"Worker {worker} finished after {processed} articles")
+    print(extractor.router.report())
+    return processed
+
+
+def print_status(queue):
+    s = queue.status()
+    total = sum(s['counts'].values())
+    done = s['counts'].get('done', 0)
+    print(f"Articles: {total} total, {done} done, {s['counts'].get('leased', 0)} in progress, "
+          f"{s['counts'].get('pending', 0)} pending, {s['counts'].get('failed', 0)} failed")
+    print(f"Active workers: {s['active_workers']}")
+    print(f"Throughput (last 15 min): {s['articles_per_minute']:.2f} articles/minute")
+    if s['eta_minutes'] is not None:
+        print(f"ETA: {s['eta_minutes']:.0f} minutes")
+    else:
+        print("ETA: unknown (no articles finished in the last 15 minutes)")
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Shared SQLite work queue for extraction runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="Add articles to the queue")
+    p_enqueue.add_argument("db", help="Queue database")
+    p_enqueue.add_argument("articles", nargs="+", help="Article files or glob patterns")
+    p_enqueue.add_argument("--requeue", action="store_true", help="Reset articles that are already queued")
+
+    p_worker = sub.add_parser("worker", help="Process articles from the queue")
+    p_worker.add_argument("db", help="Queue database")
+    p_worker.add_argument("--qc", required=True, help="QC sheet CSV")
+    p_worker.add_argument("--results", required=True, help="Results database (.db) or directory for per-article CSVs")
+    p_worker.add_argument("--store", help="Article store path prefix")
+    p_worker.add_argument("--requests-per-minute", type=int, default=50, help="Request budget shared by all workers")
+    p_worker.add_argument("--lease-seconds", type=int, default=600, help="Lease length; renewed every third of it")
+    p_worker.add_argument("--wait", action="store_true", help="Keep polling for new articles instead of exiting when empty")
+
+    p_status = sub.add_parser("status", help="Show progress and ETA")
+    p_status.add_argument("db", help="Queue database")
+
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        queue = WorkQueue(args.db)
+        paths = [p for pattern in args.articles for p in (sorted(glob.glob(pattern)) or [pattern])]
+        queue.enqueue(paths, requeue=args.requeue)
+        print(f"Queued {len(paths)} articles")
+        print_status(queue)
+    elif args.command == "worker":
+        queue = WorkQueue(args.db, lease_seconds=args.lease_seconds)
+        run_worker(queue, args.qc, args.results, args.requests_per_minute, args.store, exit_when_empty=not args.wait)
+    else:
+        print_status(WorkQueue(args.db))